@@ -2,6 +2,10 @@
 ASGI config for bondup_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Long-lived endpoints such as the notification stream (bondup_core.streams)
+need to be served through this entry point rather than wsgi.py, and the
+/api/async/ read views (bondup_core.async_views) only run on the event loop
+here. Compare both entry points with ``manage.py benchmark_concurrency``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +13,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bondup_backend.settings')
 
 application = get_asgi_application()
+
+if settings.DEBUG:
+    # runserver used to serve static files (e.g. the admin's) in development.
+    application = ASGIStaticFilesHandler(application)
@@ -49,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'bondup_core.middleware.RequestMetricsMiddleware',
+    'bondup_core.middleware.PrimaryPinningMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -82,13 +84,115 @@ WSGI_APPLICATION = 'bondup_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connections are kept open for DATABASE_CONN_MAX_AGE seconds (0 closes them
+# after every request) and checked before reuse when health checks are on.
+#
+# DATABASE_TRANSACTION_MODE applies to every atomic block on SQLite. Under
+# the default DEFERRED mode a transaction that reads before it writes
+# (get_or_create, the purge batches picking ids then deleting) has to upgrade
+# its read lock, and SQLite fails that upgrade with "database is locked" at
+# once rather than waiting on the busy timeout, since waiting could
+# deadlock. IMMEDIATE takes the write lock at BEGIN, so concurrent writers
+# queue on the timeout instead; read-only atomic blocks pay by taking that
+# lock too. Set it to DEFERRED to get SQLite's default back.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DATABASE_CONN_HEALTH_CHECKS', '1') == '1',
+        'OPTIONS': {'transaction_mode': os.environ.get('DATABASE_TRANSACTION_MODE', 'IMMEDIATE')},
+        # A file, not SQLite's shared-cache memory database: threaded tests
+        # need real locking, where writers wait on the busy timeout.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# A read replica of 'default'. Listing and stats views read from it (see
+# bondup_core.routers); tests mirror it onto the default test database.
+if os.environ.get('DATABASE_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DATABASE_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['bondup_core.routers.PrimaryReplicaRouter']
+
+# After writing, a user reads from the primary for this long. The pin cache
+# must be shared between web nodes for this to hold behind lb-01: set
+# REPLICA_PIN_CACHE_REDIS_URL (see CACHES below) or name another shared cache.
+DATABASE_REPLICA_PIN_SECONDS = 5
+DATABASE_REPLICA_PIN_CACHE = os.environ.get('DATABASE_REPLICA_PIN_CACHE', 'replica_pins')
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# 'posts' holds serialized PostSerializer output keyed by (post id, version).
+# 'users' holds User rows for CachedJWTAuthentication (see authentication.py).
+# 'replica_pins' holds read-your-writes pins (see bondup_core.routers).
+# 'stream_tickets' holds single-use notification stream tickets (see
+# bondup_core.streams).
+# LocMemCache is a bounded per-process LRU; set POST_CACHE_REDIS_URL,
+# USER_CACHE_REDIS_URL, REPLICA_PIN_CACHE_REDIS_URL and
+# STREAM_TICKET_CACHE_REDIS_URL to share them between the web nodes instead.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'posts': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'posts',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'users',
+        'TIMEOUT': int(os.environ.get('AUTH_USER_CACHE_SECONDS', 60)),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'replica_pins': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'replica_pins',
+    },
+    'stream_tickets': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'stream_tickets',
+    },
+}
+
+if os.environ.get('POST_CACHE_REDIS_URL'):
+    CACHES['posts'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['POST_CACHE_REDIS_URL'],
+        'TIMEOUT': 60 * 60,
+    }
+
+if os.environ.get('USER_CACHE_REDIS_URL'):
+    CACHES['users'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['USER_CACHE_REDIS_URL'],
+        'TIMEOUT': CACHES['users']['TIMEOUT'],
+    }
+
+if os.environ.get('REPLICA_PIN_CACHE_REDIS_URL'):
+    CACHES['replica_pins'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REPLICA_PIN_CACHE_REDIS_URL'],
+    }
+
+if os.environ.get('STREAM_TICKET_CACHE_REDIS_URL'):
+    CACHES['stream_tickets'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['STREAM_TICKET_CACHE_REDIS_URL'],
+    }
+
+
+# Loads the profile and settings along with the user, for the login response.
+AUTHENTICATION_BACKENDS = ['bondup_core.authentication.ProfileModelBackend']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -133,12 +237,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # CORS_ALLOW_ALL_ORIGINS = True
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'bondup_core.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.TokenAuthentication',  # Optional if still supporting DRF tokens
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Listing views paginate explicitly; clients may override the size with ?page_size=
+    'DEFAULT_PAGINATION_CLASS': 'bondup_core.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
 }
 
 CORS_ALLOWED_ORIGINS = [
@@ -155,4 +262,34 @@ MEDIA_ROOT = os.path.join(BASE_DIR / 'media')
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=2),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
-}
\ No newline at end of file
+}
+# Following timeline: authors above TIMELINE_FANOUT_LIMIT followers are merged
+# into timelines at read time instead of being fanned out on write. A new post
+# writes TIMELINE_FANOUT_INLINE_BATCHES batches before responding and leaves
+# the rest to TIMELINE_FANOUT_WORKERS background threads.
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_FANOUT_BATCH_SIZE = 1000
+TIMELINE_FANOUT_INLINE_BATCHES = 1
+TIMELINE_FANOUT_WORKERS = 2
+TIMELINE_BACKFILL_SIZE = 100
+
+# Feed posts embed only this many of their latest comments.
+FEED_COMMENT_PREVIEW_SIZE = 3
+
+# Full-text search ranks only this many of the newest matches (bondup_core.search).
+SEARCH_RANK_WINDOW = 1000
+
+# Likes/comments on the same post are folded into one notification while
+# the previous one is younger than this.
+NOTIFICATION_COALESCE_WINDOW = timedelta(hours=24)
+
+# Pub/sub used to push new notifications to open /api/notifications/stream/
+# connections. Swap for an out-of-process broker when running several workers.
+PUBSUB_BROKER = 'bondup_core.pubsub.InProcessBroker'
+NOTIFICATION_STREAM_KEEPALIVE = 15
+
+# Request instrumentation (bondup_core.middleware.RequestMetricsMiddleware).
+# Unsampled requests skip it entirely, so keep the rate low in production.
+REQUEST_METRICS_SAMPLE_RATE = 1.0 if DEBUG else 0.01
+REQUEST_METRICS_SLOW_MS = 500
+REQUEST_METRICS_SLOW_QUERIES = 50
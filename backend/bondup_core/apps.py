@@ -5,8 +5,6 @@ class BondupCoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bondup_core'
 
-def ready(self):
+    def ready(self):
+        import bondup_core.checks
         import bondup_core.signals
-
-def ready(self):
-    import bondup_core.signals
@@ -0,0 +1,134 @@
+"""Async variants of the read-heavy endpoints, served natively under ASGI.
+
+Under ``bondup_backend.asgi`` these run on the event loop: a request that
+is waiting on the database holds no worker thread, so one process keeps
+many more connections open than the threaded WSGI path. Django's ORM is
+still synchronous underneath; every ``a``-prefixed call and
+``sync_to_async`` below is one hop to the ORM's worker thread. The views
+therefore load each piece in as few calls as possible.
+
+Responses match the synchronous views in views.py field for field.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.request import Request
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .authentication import CachedJWTAuthentication
+from .conditional import add_validators, make_etag, not_modified, post_page_etag
+from .metrics import serializing
+from .models import Notification, Post, Profile
+from .pagination import KeysetPagination
+from .post_cache import serialize_posts
+from .routers import replica_reads
+from .serializers import NotificationSerializer, UserSerializer
+from .timeline import following_timeline_sources
+from .viewer_state import embed_viewer_state
+
+
+async def authenticate(request):
+    """The user for the request's JWT, or None.
+
+    Token validation is pure computation and the user usually comes from
+    the ``users`` cache, so this normally runs without leaving the event loop.
+    """
+    auth = CachedJWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return await auth.aget_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def async_api_view(view):
+    """Authenticate with a JWT and hand the view a DRF ``Request``.
+
+    The DRF request only supplies ``query_params`` and ``user`` to the shared
+    pagination and viewer-state helpers; DRF's own dispatch is not involved.
+    All of these views are reads, so they may use the replica.
+    """
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await authenticate(request)
+        if user is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+        request.user = user
+        drf_request = Request(request)
+        drf_request.user = user
+        with replica_reads(request):
+            return await view(drf_request, *args, **kwargs)
+    return wrapper
+
+
+async def post_page_response(request, paginator, posts):
+    etag = post_page_etag(request, posts, paginator)
+    response = not_modified(request, etag)
+    if response is None:
+        items = await sync_to_async(lambda: embed_viewer_state(request, serialize_posts(posts)))()
+        response = add_validators(JsonResponse({'next': paginator.get_next_link(), 'results': items}), etag)
+    return response
+
+
+@async_api_view
+async def feed(request):
+    paginator = KeysetPagination()
+    posts = await paginator.apaginate_queryset(Post.objects.only('id', 'created_at', 'version'), request)
+    return await post_page_response(request, paginator, posts)
+
+
+@async_api_view
+async def following_feed(request):
+    paginator = KeysetPagination()
+    sources = await sync_to_async(following_timeline_sources)(request.user)
+    keys = await paginator.apaginate_sources(sources, request, Post)
+    posts = await Post.objects.only('id', 'version').ain_bulk([post_id for _, post_id in keys])
+    posts = [posts[post_id] for _, post_id in keys if post_id in posts]
+    return await post_page_response(request, paginator, posts)
+
+
+@async_api_view
+async def notifications(request):
+    paginator = KeysetPagination()
+    page = await paginator.apaginate_queryset(
+        Notification.objects.filter(recipient=request.user).select_related('actor'), request
+    )
+    with serializing():
+        data = NotificationSerializer(page, many=True, context={'request': request}).data
+    return JsonResponse({'next': paginator.get_next_link(), 'results': data})
+
+
+@async_api_view
+async def profile(request):
+    user = request.user
+    # One query serves both the validator and the profile fields of the body.
+    # Accounts from before profiles were created on signup get one here.
+    user.profile, _ = await Profile.objects.aget_or_create(user=user)
+    etag = make_etag(user.id, user.profile.updated_at)
+    response = not_modified(request, etag, user.profile.updated_at)
+    if response is None:
+        response = add_validators(JsonResponse(UserSerializer(user).data), etag, user.profile.updated_at)
+    return response
+
+
+@async_api_view
+async def follow_stats(request, username=None):
+    profiles = Profile.objects.filter(user__username=username, deleted_at__isnull=True) if username else Profile.objects.filter(user=request.user)
+    stats = await profiles.values('followers_count', 'following_count').afirst()
+    if stats is None:
+        return JsonResponse({"error": "User not found"}, status=404)
+
+    etag = make_etag(stats['followers_count'], stats['following_count'])
+    response = not_modified(request, etag)
+    if response is None:
+        response = add_validators(JsonResponse({
+            "followers": stats['followers_count'],
+            "following": stats['following_count'],
+        }), etag)
+    return response
@@ -0,0 +1,114 @@
+"""JWT authentication that resolves users from a short-lived cache.
+
+simplejwt's ``JWTAuthentication`` loads the ``User`` row on every request
+before the view runs. ``CachedJWTAuthentication`` keeps that row in the
+``users`` cache for ``AUTH_USER_CACHE_SECONDS`` (60 by default) instead, so an
+authenticated request normally costs no query to identify its user.
+
+Entries are dropped whenever a user or their profile is saved or deleted
+(see signals.py), which covers password, activation and profile changes.
+With the default per-process cache another web node only notices after
+the timeout; set ``USER_CACHE_REDIS_URL`` to share the cache and its
+invalidations between nodes. Misses are read from the primary even inside
+``replica_reads``: a lagging replica would reject brand-new accounts and
+keep accepting deactivated ones.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .routers import PRIMARY_ALIAS
+
+CACHE_ALIAS = 'users'
+
+
+def user_cache_key(user_id):
+    return f'user:{user_id}'
+
+
+def forget_user(user_id):
+    caches[CACHE_ALIAS].delete(user_cache_key(user_id))
+
+
+def cached_user(user_id):
+    """The user row for a token's user id, loaded at most once per cache timeout."""
+    cache = caches[CACHE_ALIAS]
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = get_user_model().objects.using(PRIMARY_ALIAS).filter(**{jwt_settings.USER_ID_FIELD: user_id}).first()
+        if user is not None:
+            cache.set(key, user)
+    return user
+
+
+async def acached_user(user_id):
+    cache = caches[CACHE_ALIAS]
+    key = user_cache_key(user_id)
+    user = await cache.aget(key)
+    if user is None:
+        user = await get_user_model().objects.using(PRIMARY_ALIAS).filter(**{jwt_settings.USER_ID_FIELD: user_id}).afirst()
+        if user is not None:
+            await cache.aset(key, user)
+    return user
+
+
+class ProfileModelBackend(ModelBackend):
+    """``ModelBackend`` that loads the user together with their profile and settings.
+
+    The login response serializes both, so logging in through
+    ``authenticate()`` still costs a single SELECT.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = (
+            UserModel._default_manager.select_related('profile', 'settings')
+            .filter(**{UserModel.USERNAME_FIELD: username})
+            .first()
+        )
+        if user is None:
+            # Hash anyway, so unknown usernames take as long as wrong passwords.
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` with the user lookup served from the ``users`` cache.
+
+    Performs the same checks as simplejwt's ``get_user`` on the cached row.
+    """
+
+    def get_user(self, validated_token):
+        return self.check_user(cached_user(self.token_user_id(validated_token)), validated_token)
+
+    async def aget_user(self, validated_token):
+        return self.check_user(await acached_user(self.token_user_id(validated_token)), validated_token)
+
+    def token_user_id(self, validated_token):
+        try:
+            return validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def check_user(self, user, validated_token):
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
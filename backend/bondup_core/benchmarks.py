@@ -0,0 +1,216 @@
+"""Endpoint benchmark scenarios driven through the Django test client.
+
+Used by the ``benchmark_endpoints`` management command. Every named URL in
+``bondup_core.urls`` needs a scenario here (or an entry in ``UNBENCHMARKED``)
+so new endpoints cannot silently escape measurement.
+"""
+import json
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .metrics import percentile
+from .models import Comment, Post
+from .timeline import fanning_out_inline
+from . import urls as core_urls
+
+# Endpoints the synchronous test client cannot drive, with the reason.
+UNBENCHMARKED = {
+    'notification_stream': "long-lived server-sent event stream",
+}
+
+
+class Scenario:
+    def __init__(self, url_name, method='get', kwargs=None, data=None, query=None, name=None):
+        self.url_name = url_name
+        self.name = name
+        self.method = method
+        self.kwargs = kwargs or (lambda ctx: {})
+        self.data = data
+        self.query = query
+
+    @property
+    def label(self):
+        return self.name or f'{self.method.upper()} {self.url_name}'
+
+
+SCENARIOS = [
+    Scenario('login', 'post', data=lambda ctx: {'username': ctx.user.username, 'password': ctx.password}),
+    Scenario('token_login', 'post', data=lambda ctx: {'username': ctx.user.username, 'password': ctx.password}),
+    Scenario('signup', 'post', data=lambda ctx: {'username': 'benchmark-signup', 'email': 'signup@example.com', 'password': 'benchmark-pass'}),
+    Scenario('posts'),
+    Scenario('posts', query=lambda ctx: {'include': 'author_followed_by_me'}, name='GET posts?include=author_followed_by_me'),
+    Scenario('posts', 'post', data=lambda ctx: {'caption': 'benchmark post'}),
+    Scenario('following_feed'),
+    Scenario('search', query=lambda ctx: {'q': ctx.search_term}),
+    Scenario('search', query=lambda ctx: {'q': ctx.search_term, 'type': 'people'}, name='GET search?type=people'),
+    Scenario('create_post', 'post', data=lambda ctx: {'caption': 'benchmark post'}),
+    Scenario('user_posts'),
+    Scenario('post_detail', 'put', kwargs=lambda ctx: {'post_id': ctx.own_post.id}, data=lambda ctx: {'caption': 'edited'}),
+    Scenario('post_detail', 'delete', kwargs=lambda ctx: {'post_id': ctx.own_post.id}),
+    Scenario('delete_post', 'delete', kwargs=lambda ctx: {'post_id': ctx.own_post.id}),
+    Scenario('like_dislike', 'post', kwargs=lambda ctx: {'post_id': ctx.hot_post.id}, data=lambda ctx: {'value': 'like'}),
+    Scenario('like_dislike', 'delete', kwargs=lambda ctx: {'post_id': ctx.hot_post.id}),
+    Scenario('comment', 'post', kwargs=lambda ctx: {'post_id': ctx.hot_post.id}, data=lambda ctx: {'text': 'benchmark comment'}),
+    Scenario('comment', 'delete', kwargs=lambda ctx: {'post_id': ctx.own_comment.post_id}, data=lambda ctx: {'comment_id': ctx.own_comment.id}),
+    Scenario('post_comments', kwargs=lambda ctx: {'post_id': ctx.busy_post.id}),
+    Scenario('comment_delete', 'delete', kwargs=lambda ctx: {'comment_id': ctx.own_comment.id}),
+    Scenario('notifications'),
+    Scenario('notification_unread_count'),
+    Scenario('notification_mark_read', 'post', data=lambda ctx: {}),
+    Scenario('notification_stream_ticket', 'post', data=lambda ctx: {}),
+    Scenario('profile'),
+    Scenario('profile', 'put', data=lambda ctx: {'username': ctx.user.username}),
+    Scenario('update_profile', 'put', data=lambda ctx: {'bio': 'benchmark bio'}),
+    Scenario('my-posts'),
+    Scenario('my_follow_stats'),
+    Scenario('user_follow_stats', kwargs=lambda ctx: {'username': ctx.celebrity.username}),
+    Scenario('bulk_follow_stats', query=lambda ctx: {'usernames': ','.join(ctx.card_usernames)}),
+    Scenario('toggle_follow', 'post', kwargs=lambda ctx: {'username': ctx.celebrity.username}),
+    Scenario('check_follow_status', kwargs=lambda ctx: {'username': ctx.celebrity.username}),
+    Scenario('check_follow_status_bulk', query=lambda ctx: {'usernames': ','.join(ctx.card_usernames)}),
+    Scenario('user_settings'),
+    Scenario('user_settings', 'put', data=lambda ctx: {'colorScheme': 'dark', 'sidebarStyle': 'compact', 'postDisplay': 'grid'}),
+    Scenario('view_metrics'),
+    Scenario('account_export'),
+    Scenario('account_export', query=lambda ctx: {'gzip': '1'}, name='GET account_export?gzip=1'),
+    Scenario('delete_account', 'delete', data=lambda ctx: {'password': ctx.password}),
+    Scenario('moods'),
+    Scenario('moods', 'post', data=lambda ctx: {'mood': 'happy', 'note': 'benchmark mood'}),
+    Scenario('mood_distribution', query=lambda ctx: ctx.year_range),
+    Scenario('mood_trends', query=lambda ctx: {**ctx.year_range, 'period': 'week'}),
+    Scenario('mood_streak'),
+    Scenario('async_posts'),
+    Scenario('async_following_feed'),
+    Scenario('async_notifications'),
+    Scenario('async_profile'),
+    Scenario('async_my_follow_stats'),
+    Scenario('async_user_follow_stats', kwargs=lambda ctx: {'username': ctx.celebrity.username}),
+]
+
+
+class BenchmarkContext:
+    """The viewer and the rows the scenarios point at."""
+
+    def __init__(self, user, password):
+        self.user = user
+        self.password = password
+        self.hot_post = Post.objects.exclude(user=user).order_by('-like_count').first()
+        self.busy_post = Post.objects.order_by('-comment_count').first()
+        # A word every generated caption draws from, so the query has plenty of matches.
+        self.search_term = 'coffee'
+        # The widest range the mood analytics accept: a yearly dashboard.
+        today = timezone.localdate()
+        self.year_range = {'start': (today - timedelta(days=365)).isoformat(), 'end': today.isoformat()}
+        self.celebrity = type(user).objects.exclude(pk=user.pk).order_by('-profile__followers_count').first()
+        # Authors of a feed page's worth of posts, as a client rendering cards would ask for.
+        self.card_usernames = list(
+            Post.objects.order_by('-created_at').values_list('user__username', flat=True).distinct()[:20]
+        )
+        # Write scenarios run inside a rolled-back savepoint, so these are
+        # recreated fresh for every request.
+        self.own_post = Post.objects.create(user=user, caption='benchmark fixture', comment_count=1)
+        self.own_comment = Comment.objects.create(user=user, post=self.own_post, text='benchmark fixture')
+
+
+@contextmanager
+def running_on_commit_callbacks():
+    """Run the ``on_commit`` callbacks queued inside the block when it exits.
+
+    Requests are benchmarked in a transaction that is rolled back, so their
+    callbacks (timeline fan-out, notification pushes) would otherwise never
+    run and their cost would be left out. Callbacks queued by callbacks are
+    run too, like ``TestCase.captureOnCommitCallbacks(execute=True)``. A
+    fan-out worker couldn't see the uncommitted post, so large fan-outs are
+    written (and timed) here in full rather than handed off.
+    """
+    start = len(connection.run_on_commit)
+    yield
+    with fanning_out_inline():
+        while len(connection.run_on_commit) > start:
+            callbacks = connection.run_on_commit[start:]
+            del connection.run_on_commit[start:]
+            for _, callback, _ in callbacks:
+                callback()
+
+
+def missing_scenarios():
+    covered = {scenario.url_name for scenario in SCENARIOS} | set(UNBENCHMARKED)
+    return sorted(p.name for p in core_urls.urlpatterns if p.name and p.name not in covered)
+
+
+def run_scenario(client, ctx, scenario, iterations, warmup):
+    url = reverse(scenario.url_name, kwargs=scenario.kwargs(ctx))
+    if scenario.query:
+        url = f'{url}?{urlencode(scenario.query(ctx))}'
+    request = getattr(client, scenario.method)
+    timings, queries, sizes, statuses = [], [], [], set()
+
+    for i in range(warmup + iterations):
+        data = scenario.data(ctx) if scenario.data else None
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                with running_on_commit_callbacks():
+                    if data is None:
+                        response = request(url)
+                    else:
+                        response = request(url, json.dumps(data), content_type='application/json')
+                    # Streamed bodies are produced while they are read, so reading them is part of the request.
+                    body = b''.join(response.streaming_content) if response.streaming else response.content
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+            queries.append(len(captured))
+            sizes.append(len(body))
+            statuses.add(response.status_code)
+
+    return {
+        'p50': round(percentile(timings, 0.50), 3),
+        'p95': round(percentile(timings, 0.95), 3),
+        'p99': round(percentile(timings, 0.99), 3),
+        'queries': max(queries),
+        'bytes': max(sizes),
+        'status': sorted(statuses),
+    }
+
+
+def run_benchmarks(user, password, iterations=50, warmup=3, only=None):
+    """Return ``{label: metrics}`` for every scenario; the database is left untouched."""
+    token = AccessToken.for_user(user)
+    # Endpoints that error are reported with their status rather than aborting the run.
+    client = Client(raise_request_exception=False, HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
+    results = {}
+    with transaction.atomic():
+        ctx = BenchmarkContext(user, password)
+        for scenario in SCENARIOS:
+            if only and scenario.url_name not in only:
+                continue
+            results[scenario.label] = run_scenario(client, ctx, scenario, iterations, warmup)
+        transaction.set_rollback(True)
+    return results
+
+
+def find_regressions(results, baseline, latency_tolerance=0.25, bytes_tolerance=0.10):
+    regressions = []
+    for label, current in results.items():
+        previous = baseline.get(label)
+        if previous is None:
+            continue
+        for metric in ('p50', 'p95', 'p99'):
+            if current[metric] > previous[metric] * (1 + latency_tolerance):
+                regressions.append(f"{label}: {metric} {previous[metric]}ms -> {current[metric]}ms")
+        if current['queries'] > previous['queries']:
+            regressions.append(f"{label}: queries {previous['queries']} -> {current['queries']}")
+        if current['bytes'] > previous['bytes'] * (1 + bytes_tolerance):
+            regressions.append(f"{label}: bytes {previous['bytes']} -> {current['bytes']}")
+    return regressions
@@ -0,0 +1,23 @@
+from django.core import checks
+from django.db import connections
+
+# reactions.py settles racing taps with INSERT/DELETE ... RETURNING.
+SQLITE_MINIMUM = (3, 35)
+
+
+@checks.register(checks.Tags.compatibility)
+def sqlite_supports_returning(app_configs, **kwargs):
+    errors = []
+    for alias in connections:
+        connection = connections[alias]
+        if connection.vendor != 'sqlite':
+            continue
+        version = connection.Database.sqlite_version_info
+        if version < SQLITE_MINIMUM:
+            errors.append(checks.Error(
+                f"Database '{alias}' runs SQLite {'.'.join(map(str, version))}; "
+                f"bondup_core needs {'.'.join(map(str, SQLITE_MINIMUM))} or newer for RETURNING.",
+                hint="Upgrade the SQLite library Python's sqlite3 module is linked against.",
+                id='bondup_core.E001',
+            ))
+    return errors
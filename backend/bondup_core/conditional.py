@@ -0,0 +1,71 @@
+"""Conditional GET: answer repeat fetches of unchanged data with 304 Not Modified.
+
+Views compute a cheap validator first (a row's ``updated_at``, counter
+values, the ``(id, version)`` keys of a page) and pass the expensive part
+to ``conditional_response`` as a callable, which is skipped entirely when
+the client already holds the current representation.
+"""
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .viewer_state import requested_includes
+
+
+def make_etag(*parts):
+    return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """A 304 response if the client's ``If-None-Match``/``If-Modified-Since`` still hold, else None."""
+    quoted = quote_etag(etag) if etag else None
+    response = get_conditional_response(request, etag=quoted, last_modified=_timestamp(last_modified))
+    if response is not None:
+        add_validators(response, etag, last_modified)
+    return response
+
+
+def add_validators(response, etag=None, last_modified=None):
+    """Attach validators to a successful response.
+
+    Responses are per-user, so they are marked private and must be
+    revalidated on every use; the browser then sends the validators back
+    by itself.
+    """
+    if not 200 <= response.status_code < 300 and response.status_code != 304:
+        return response
+    if etag:
+        response.headers['ETag'] = quote_etag(etag)
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(_timestamp(last_modified))
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def conditional_response(request, build, etag=None, last_modified=None):
+    """``build()``'s response with validators attached, or a 304 if the client's copy is current."""
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = add_validators(build(), etag, last_modified)
+    return response
+
+
+def _timestamp(value):
+    return timegm(value.utctimetuple()) if value else None
+
+
+def post_page_etag(request, posts, paginator):
+    """Validator for a page of posts from the keys the paginator already loaded.
+
+    Any edit, reaction or comment bumps ``Post.version``, and the viewer's
+    own reaction only changes through those, so ``(id, version)`` pairs
+    cover everything the serialized page shows. Optional includes such as
+    follow state change independently of the posts, so those pages get no
+    validator and are always sent in full.
+    """
+    if requested_includes(request):
+        return None
+    return make_etag(request.user.id, [(post.id, post.version) for post in posts], paginator.next_position)
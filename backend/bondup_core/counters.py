@@ -0,0 +1,87 @@
+import operator
+from functools import reduce
+
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Like, Post, Profile
+
+
+def adjust_post_counters(post_id, **deltas):
+    """Apply counter deltas, e.g. like_count=1, dislike_count=-1, in one UPDATE.
+
+    F-expressions keep concurrent writers from overwriting each other's
+    increments; callers run this inside the transaction that wrote the
+    Like/Comment row so the two never drift apart. The post's version is
+    bumped too, invalidating its cached representation.
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if changes:
+        Post.objects.filter(pk=post_id).update(version=F('version') + 1, **changes)
+
+
+def adjust_follow_counters(follower_id, following_id, delta):
+    """Move both sides' Profile follow counters by ``delta`` (+1 follow, -1 unfollow)."""
+    Profile.objects.filter(user_id=follower_id).update(following_count=F('following_count') + delta)
+    Profile.objects.filter(user_id=following_id).update(followers_count=F('followers_count') + delta)
+
+
+def uncount_account(user_id):
+    """Take a deleted account's reactions, comments and follows out of everyone else's counters.
+
+    Set-based, so hiding an account costs a fixed number of UPDATEs however
+    active it was; the rows themselves are purged later without adjusting
+    counters again (see purges.py).
+    """
+    for value in ('like', 'dislike'):
+        reacted = Like.objects.filter(user_id=user_id, value=value).values('post_id')
+        Post.objects.filter(pk__in=reacted).update(version=F('version') + 1, **{f'{value}_count': F(f'{value}_count') - 1})
+    own_comments = Comment.objects.filter(user_id=user_id)
+    Post.objects.filter(pk__in=own_comments.values('post_id')).update(
+        version=F('version') + 1,
+        comment_count=F('comment_count') - _count_subquery(own_comments),
+    )
+    followed = Follow.objects.filter(follower_id=user_id).values('following_id')
+    Profile.objects.filter(user_id__in=followed).update(followers_count=F('followers_count') - 1)
+    followers = Follow.objects.filter(following_id=user_id).values('follower_id')
+    Profile.objects.filter(user_id__in=followers).update(following_count=F('following_count') - 1)
+
+
+def _live(queryset, field='user'):
+    # Rows of deleted accounts awaiting purge no longer count (see uncount_account).
+    return queryset.filter(**{f'{field}__profile__deleted_at__isnull': True})
+
+
+def _count_subquery(queryset, field='post', outer='pk'):
+    counts = queryset.filter(**{field: OuterRef(outer)}).order_by().values(field).annotate(n=Count('id')).values('n')
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def recount_post_counters(queryset=None):
+    """Recompute the denormalized counters from the Like and Comment tables.
+
+    Only posts whose counters disagree are written and have their version
+    bumped, so a routine recount leaves the post cache alone. Returns the
+    number of posts corrected.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    counts = {
+        'like_count': _count_subquery(_live(Like.objects.filter(value='like'))),
+        'dislike_count': _count_subquery(_live(Like.objects.filter(value='dislike'))),
+        'comment_count': _count_subquery(_live(Comment.objects.all())),
+    }
+    drifted = queryset.alias(**{f'actual_{field}': count for field, count in counts.items()}).filter(
+        reduce(operator.or_, (~Q(**{field: F(f'actual_{field}')}) for field in counts))
+    )
+    return drifted.update(version=F('version') + 1, **counts)
+
+
+def recount_follow_counters(queryset=None):
+    """Recompute Profile follower/following counters from the Follow table."""
+    if queryset is None:
+        queryset = Profile.objects.all()
+    return queryset.update(
+        followers_count=_count_subquery(_live(Follow.objects.all(), 'follower'), 'following', 'user'),
+        following_count=_count_subquery(_live(Follow.objects.all(), 'following'), 'follower', 'user'),
+    )
@@ -0,0 +1,96 @@
+"""Account data export as NDJSON, streamed with constant memory.
+
+Every record is one JSON object on its own line, tagged with ``type``.
+Tables are read with ``.values().iterator(chunk_size=...)``, so at most one
+chunk of rows is held at a time, and lines are flushed in buffers of about
+``EXPORT_BUFFER_BYTES`` (optionally gzipped on the fly). The response
+size therefore grows with the account while worker memory does not.
+"""
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Follow, Like, MoodEntry, Notification, Post, Profile, UserSetting
+
+CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+BUFFER_BYTES = getattr(settings, 'EXPORT_BUFFER_BYTES', 64 * 1024)
+
+ACCOUNT_FIELDS = ('username', 'email', 'first_name', 'last_name', 'date_joined', 'last_login')
+PROFILE_FIELDS = ('name', 'bio', 'contact', 'gender', 'professional_info')
+
+# type -> (rows of the user, exported fields), written in this order after the account.
+SECTIONS = {
+    'settings': (lambda user: UserSetting.objects.filter(user=user), ('colorScheme', 'sidebarStyle', 'postDisplay')),
+    'post': (
+        lambda user: Post.objects.filter(user=user).order_by('created_at', 'id'),
+        ('id', 'caption', 'image', 'created_at', 'edited', 'like_count', 'dislike_count', 'comment_count'),
+    ),
+    'comment': (
+        lambda user: Comment.objects.filter(user=user).order_by('created_at', 'id'),
+        ('id', 'post_id', 'text', 'created_at'),
+    ),
+    'like': (lambda user: Like.objects.filter(user=user).order_by('id'), ('post_id', 'value', 'created_at')),
+    'following': (
+        lambda user: Follow.objects.filter(follower=user).order_by('created_at', 'id'),
+        ('following__username', 'created_at'),
+    ),
+    'follower': (
+        lambda user: Follow.objects.filter(following=user).order_by('created_at', 'id'),
+        ('follower__username', 'created_at'),
+    ),
+    'notification': (
+        lambda user: Notification.objects.filter(recipient=user).order_by('created_at', 'id'),
+        ('id', 'actor__username', 'post_id', 'verb', 'actor_count', 'message', 'is_read', 'created_at'),
+    ),
+    'mood': (
+        lambda user: MoodEntry.objects.filter(user=user).order_by('created_at', 'id'),
+        ('id', 'mood', 'note', 'created_at'),
+    ),
+}
+
+
+def account_records(user):
+    account = {field: getattr(user, field) for field in ACCOUNT_FIELDS}
+    account.update(Profile.objects.filter(user=user).values(*PROFILE_FIELDS).first() or {})
+    yield {'type': 'account', **account}
+    for kind, (rows, fields) in SECTIONS.items():
+        for row in rows(user).values(*fields).iterator(chunk_size=CHUNK_SIZE):
+            yield {'type': kind, **{field.replace('__', '_'): value for field, value in row.items()}}
+
+
+def ndjson_chunks(records, compress=False):
+    """Encoded NDJSON in buffers of about ``BUFFER_BYTES``, gzipped if ``compress``."""
+    gzip = zlib.compressobj(wbits=31) if compress else None
+    buffer, size = [], 0
+    for record in records:
+        line = json.dumps(record, cls=DjangoJSONEncoder).encode() + b'\n'
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_BYTES:
+            chunk = b''.join(buffer)
+            buffer, size = [], 0
+            if gzip:
+                chunk = gzip.compress(chunk)
+                if not chunk:
+                    continue
+            yield chunk
+    chunk = b''.join(buffer)
+    if gzip:
+        chunk = gzip.compress(chunk) + gzip.flush()
+    if chunk:
+        yield chunk
+
+
+async def aiterate(chunks):
+    """Serve a synchronous chunk iterator under ASGI one chunk per thread hop.
+
+    Handed a plain iterator, Django's ASGI handler would read the whole
+    export into memory before sending the first byte.
+    """
+    chunks = iter(chunks)
+    fetch = sync_to_async(next)
+    while (chunk := await fetch(chunks, None)) is not None:
+        yield chunk
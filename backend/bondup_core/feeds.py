@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db.models import F, Prefetch, Q
+
+from .models import Comment, Post
+
+COMMENT_PREVIEW_SIZE = getattr(settings, 'FEED_COMMENT_PREVIEW_SIZE', 3)
+
+
+def post_feed_queryset(queryset=None):
+    """Posts with everything PostSerializer reads loaded up front.
+
+    Counts come from the denormalized Post columns and only the latest
+    ``COMMENT_PREVIEW_SIZE`` comments per post are prefetched, with their
+    authors, into ``latest_comments``. Serializing a page therefore costs a
+    fixed number of queries and a bounded payload however busy a post is;
+    the full thread is paged through ``/api/posts/<id>/comments/``.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    latest = (
+        Comment.objects.filter(user__profile__deleted_at__isnull=True)
+        .select_related('user')
+        .order_by('-created_at', '-id')[:COMMENT_PREVIEW_SIZE]
+    )
+    return (
+        queryset
+        .select_related('user')
+        .prefetch_related(Prefetch('comments', queryset=latest, to_attr='latest_comments'))
+    )
+
+
+def bump_posts_showing(user_id):
+    """Bump the version of every post whose payload shows the user's username.
+
+    That is their own posts and the posts they commented on, since a comment
+    may be in the preview. Cached payloads and page validators are keyed on
+    the version, so a rename is seen on the next read.
+    """
+    commented = Comment.objects.filter(user_id=user_id).values('post_id')
+    Post.objects.filter(Q(user_id=user_id) | Q(pk__in=commented)).update(version=F('version') + 1)
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bondup_core.metrics import percentile
+
+# Read endpoints with an async variant: sync path -> async path.
+ENDPOINTS = {
+    'posts': ('/api/posts/', '/api/async/posts/'),
+    'following_feed': ('/api/feed/following/', '/api/async/feed/following/'),
+    'notifications': ('/api/notifications/', '/api/async/notifications/'),
+    'profile': ('/api/profile/', '/api/async/profile/'),
+    'follow_stats': ('/api/follow-stats/', '/api/async/follow-stats/'),
+}
+
+
+def wsgi_request(application, path, token):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_AUTHORIZATION': f'Bearer {token}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': BytesIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    body = application(environ, lambda s, headers, exc_info=None: status.append(int(s.split()[0])))
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return status[0]
+
+
+async def asgi_request(application, path, token):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    received = False
+    disconnected = asyncio.Event()
+    status = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The handler listens for a disconnect while the view runs; the client never leaves.
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+def run_wsgi(application, path, token, concurrency, requests):
+    def timed(_):
+        started = time.perf_counter()
+        status = wsgi_request(application, path, token)
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    return time.perf_counter() - started, results
+
+
+def run_asgi(application, path, token, concurrency, requests):
+    async def main():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def timed():
+            async with slots:
+                started = time.perf_counter()
+                status = await asgi_request(application, path, token)
+                return time.perf_counter() - started, status
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(timed() for _ in range(requests)))
+        return time.perf_counter() - started, results
+
+    return asyncio.run(main())
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent-connection throughput of the read endpoints: sync views through "
+        "bondup_backend.wsgi on a thread pool (one thread per connection, like a threaded WSGI "
+        "server) against their async variants through bondup_backend.asgi on one event loop. "
+        "The sync views under ASGI are included to separate handler cost from view cost. "
+        "Both handlers are driven in-process, so no server or network is involved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', default='bench_0', help="Viewer to authenticate as (see generate_dataset).")
+        parser.add_argument('--endpoints', nargs='*', choices=sorted(ENDPOINTS), default=sorted(ENDPOINTS))
+        parser.add_argument('--concurrency', nargs='*', type=int, default=[1, 10, 50])
+        parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint, mode and concurrency level.")
+        parser.add_argument('--warmup', type=int, default=20)
+
+    def handle(self, *args, **options):
+        from bondup_backend.asgi import application as asgi_application
+        from bondup_backend.wsgi import application as wsgi_application
+
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' not found; run generate_dataset first.")
+        token = str(AccessToken.for_user(user))
+
+        # (label, runner, which path): the sync view under both handlers, then the async variant.
+        modes = [
+            ('wsgi', lambda path, c, n: run_wsgi(wsgi_application, path, token, c, n), 0),
+            ('asgi-sync', lambda path, c, n: run_asgi(asgi_application, path, token, c, n), 0),
+            ('asgi', lambda path, c, n: run_asgi(asgi_application, path, token, c, n), 1),
+        ]
+        # Queueing under load trips the slow-request log on every request.
+        logging.getLogger('bondup_core.performance').disabled = True
+
+        self.stdout.write(f"{'endpoint':<16}{'mode':<11}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}  status")
+        for endpoint in options['endpoints']:
+            for mode, run, path_index in modes:
+                path = ENDPOINTS[endpoint][path_index]
+                run(path, 1, options['warmup'])
+                for concurrency in options['concurrency']:
+                    elapsed, results = run(path, concurrency, options['requests'])
+                    timings = [duration * 1000 for duration, _ in results]
+                    statuses = sorted({status for _, status in results})
+                    self.stdout.write(
+                        f"{endpoint:<16}{mode:<11}{concurrency:>6}{len(results) / elapsed:>10.1f}"
+                        f"{percentile(timings, 0.50):>10.2f}{percentile(timings, 0.99):>10.2f}  "
+                        f"{','.join(map(str, statuses))}"
+                    )
@@ -0,0 +1,55 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from bondup_core.benchmarks import find_regressions, missing_scenarios, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every bondup_core endpoint through the test client and report p50/p95/p99 "
+        "latency, query count and response size. With --baseline, fail when any regress."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', default='bench_0', help="Viewer to authenticate as (see generate_dataset).")
+        parser.add_argument('--password', default='benchmark')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--only', nargs='*', help="Limit the run to these URL names.")
+        parser.add_argument('--baseline', help="JSON file of previous results to compare against.")
+        parser.add_argument('--write-baseline', help="Write this run's results to a JSON file.")
+        parser.add_argument('--latency-tolerance', type=float, default=0.25)
+        parser.add_argument('--bytes-tolerance', type=float, default=0.10)
+
+    def handle(self, *args, **options):
+        missing = missing_scenarios()
+        if missing:
+            raise CommandError(f"No benchmark scenario for: {', '.join(missing)}")
+
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' not found; run generate_dataset first.")
+
+        results = run_benchmarks(user, options['password'], options['iterations'], options['warmup'], options['only'])
+
+        self.stdout.write(f"{'endpoint':<42}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'bytes':>10}  status")
+        for label, metrics in results.items():
+            self.stdout.write(
+                f"{label:<42}{metrics['p50']:>9.2f}{metrics['p95']:>9.2f}{metrics['p99']:>9.2f}"
+                f"{metrics['queries']:>9}{metrics['bytes']:>10}  {','.join(map(str, metrics['status']))}"
+            )
+
+        if options['write_baseline']:
+            with open(options['write_baseline'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = find_regressions(results, baseline, options['latency_tolerance'], options['bytes_tolerance'])
+            if regressions:
+                raise CommandError("Regressions against baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
@@ -0,0 +1,71 @@
+import logging
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from bondup_core.metrics import percentile
+
+
+def two_step_login(client, username, password):
+    """The old frontend flow: api/token/, then login/ with the new access token."""
+    credentials = {'username': username, 'password': password}
+    response = client.post('/api/token/', credentials, content_type='application/json')
+    if response.status_code != 200:
+        return response.status_code
+    access = response.json()['access']
+    return client.post('/api/login/', credentials, content_type='application/json',
+                       HTTP_AUTHORIZATION=f'Bearer {access}').status_code
+
+
+def combined_login(client, username, password):
+    credentials = {'username': username, 'password': password}
+    return client.post('/api/auth/login/', credentials, content_type='application/json').status_code
+
+
+FLOWS = {
+    'two-step': two_step_login,
+    'combined': combined_login,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare logins per second of the two-request login flow (api/token/ then login/) "
+        "against the combined api/auth/login/ endpoint. Runs in one thread, so the rate is "
+        "per core; password hashing dominates both flows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', default='bench_0', help="User to log in as (see generate_dataset).")
+        parser.add_argument('--password', default='benchmark')
+        parser.add_argument('--logins', type=int, default=50, help="Logins per flow.")
+        parser.add_argument('--warmup', type=int, default=3)
+
+    def handle(self, *args, **options):
+        username, password = options['username'], options['password']
+        user = User.objects.filter(username=username).first()
+        if user is None or not user.check_password(password):
+            raise CommandError(f"Cannot log in as '{username}'; run generate_dataset first.")
+
+        client = Client(raise_request_exception=False, HTTP_HOST='localhost')
+        # Every login hashes a password, which trips the slow-request log.
+        logging.getLogger('bondup_core.performance').disabled = True
+        rates = {}
+        self.stdout.write(f"{'flow':<10}{'logins/s':>10}{'p50 ms':>10}{'p99 ms':>10}  status")
+        for name, login in FLOWS.items():
+            for _ in range(options['warmup']):
+                login(client, username, password)
+            timings, statuses = [], set()
+            started = time.perf_counter()
+            for _ in range(options['logins']):
+                request_started = time.perf_counter()
+                statuses.add(login(client, username, password))
+                timings.append((time.perf_counter() - request_started) * 1000)
+            rates[name] = options['logins'] / (time.perf_counter() - started)
+            self.stdout.write(
+                f"{name:<10}{rates[name]:>10.1f}{percentile(timings, 0.50):>10.2f}"
+                f"{percentile(timings, 0.99):>10.2f}  {','.join(map(str, sorted(statuses)))}"
+            )
+        self.stdout.write(f"combined/two-step: {rates['combined'] / rates['two-step']:.2f}x")
@@ -0,0 +1,147 @@
+import logging
+import random
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+
+from bondup_core.counters import adjust_post_counters
+from bondup_core.metrics import percentile
+from bondup_core.models import Comment, Like, Notification, NotificationActor, Post, TimelineEntry
+from bondup_core.notifications import LATEST_ACTORS, format_message
+from bondup_core.purges import BATCH_SIZE, PAUSE_SECONDS, Purger, hide_post
+
+
+class Writer(threading.Thread):
+    """Comments on a post every ``interval`` seconds, recording how long each write took."""
+
+    def __init__(self, user, post, interval):
+        super().__init__(daemon=True)
+        self.user, self.post, self.interval = user, post, interval
+        self.timings, self.errors = [], 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                started = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        Comment.objects.create(user=self.user, post=self.post, text='writer')
+                        adjust_post_counters(self.post.id, comment_count=1)
+                except OperationalError:
+                    # "database is locked": the write waited out the busy timeout.
+                    self.errors += 1
+                self.timings.append((time.perf_counter() - started) * 1000)
+                time.sleep(self.interval)
+        finally:
+            connection.close()
+
+    def take(self):
+        timings, self.timings = self.timings, []
+        errors, self.errors = self.errors, 0
+        return timings, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure other writers' latency while a viral post is deleted, once with the old "
+        "single-transaction cascade and once with soft delete plus the batched purge. "
+        "Needs a file-backed database; the fixture users are removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fans', type=int, default=20000, help="Users who liked the post, have it in their timeline and are in its notification.")
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=PAUSE_SECONDS)
+        parser.add_argument('--write-interval', type=float, default=0.005, help="Seconds between the writer's commits.")
+        parser.add_argument('--baseline-seconds', type=float, default=2.0)
+        parser.add_argument('--prefix', default='purge_bench')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError("The writer needs its own connection; use a file-backed database.")
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"Users prefixed '{prefix}_' already exist; pick another --prefix.")
+        logging.getLogger('bondup_core.performance').disabled = True
+
+        author = User.objects.create_user(username=f'{prefix}_author')
+        User.objects.bulk_create(
+            User(username=f'{prefix}_{i}', password='!') for i in range(options['fans'])
+        )
+        self.fan_ids = list(User.objects.filter(username__startswith=f'{prefix}_').exclude(pk=author.pk).values_list('pk', flat=True))
+        target = Post.objects.create(user=author, caption='writer target')
+        purger = Purger(options['batch_size'], options['pause'])
+
+        def cascade(post):
+            with transaction.atomic():
+                Post.all_objects.filter(pk=post.pk).delete()
+
+        def batched(post):
+            hide_post(post)
+            purger.purge_post(post.pk)
+
+        self.stdout.write(f"{'delete':<9}{'phase':<10}{'writes':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>8}  delete s")
+        try:
+            for label, delete in (('cascade', cascade), ('batched', batched)):
+                post = self.viral_post(author, options['comments'])
+                writer = Writer(author, target, options['write_interval'])
+                writer.start()
+                try:
+                    time.sleep(options['baseline_seconds'])
+                    self.report(label, 'baseline', *writer.take())
+
+                    started = time.perf_counter()
+                    delete(post)
+                    elapsed = time.perf_counter() - started
+                finally:
+                    # Let a write that queued behind the delete finish, so it is counted.
+                    writer.stopped.set()
+                    writer.join()
+                self.report(label, 'deleting', *writer.take(), elapsed)
+        finally:
+            User.objects.filter(username__startswith=f'{prefix}_').delete()
+
+    def viral_post(self, author, comments):
+        post = Post.objects.create(user=author, caption='viral', like_count=len(self.fan_ids), comment_count=comments)
+        now = timezone.now()
+        batch_size = 5000
+        with transaction.atomic():
+            Like.objects.bulk_create((Like(user_id=fan, post=post, value='like') for fan in self.fan_ids), batch_size=batch_size)
+            TimelineEntry.objects.bulk_create(
+                (TimelineEntry(owner_id=fan, post=post, author=author, created_at=now) for fan in self.fan_ids),
+                batch_size=batch_size,
+            )
+            rng = random.Random(0)
+            commenters = [rng.choice(self.fan_ids) for _ in range(comments)]
+            Comment.objects.bulk_create(
+                (Comment(user_id=fan, post=post, text='so viral') for fan in commenters),
+                batch_size=batch_size,
+            )
+            # One coalesced notification per verb, with an actor row for everyone in it.
+            for verb, actor_ids in (('like', self.fan_ids), ('comment', list(dict.fromkeys(commenters)))):
+                if not actor_ids:
+                    continue
+                names = dict(User.objects.filter(pk__in=actor_ids[-LATEST_ACTORS:]).values_list('pk', 'username'))
+                latest = [names[pk] for pk in reversed(actor_ids[-LATEST_ACTORS:])]
+                notification = Notification.objects.create(
+                    recipient=author, actor_id=actor_ids[-1], post=post, verb=verb, actor_count=len(actor_ids),
+                    latest_actors=latest, message=format_message(latest, len(actor_ids), verb),
+                )
+                NotificationActor.objects.bulk_create(
+                    (NotificationActor(notification=notification, actor_id=fan) for fan in actor_ids),
+                    batch_size=batch_size,
+                )
+        return post
+
+    def report(self, label, phase, timings, errors, elapsed=None):
+        self.stdout.write(
+            f"{label:<9}{phase:<10}{len(timings):>8}{percentile(timings, 0.50):>10.2f}"
+            f"{percentile(timings, 0.99):>10.2f}{max(timings, default=0):>10.2f}{errors:>8}"
+            + (f"  {elapsed:.2f}" if elapsed is not None else '')
+        )
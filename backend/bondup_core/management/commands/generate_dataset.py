@@ -0,0 +1,239 @@
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from bondup_core.models import (
+    Comment, Follow, Like, MoodEntry, Notification, NotificationActor, Post, Profile, TimelineEntry, UserSetting,
+)
+from bondup_core.notifications import VERB_PHRASES, format_message
+from bondup_core.search import search_available
+from bondup_core.timeline import backfill_timeline
+
+MOODS = [choice for choice, _ in MoodEntry.MOOD_CHOICES]
+WORDS = (
+    "coffee morning weekend project family friends music travel code run "
+    "sunset book movie garden dinner study gym rain city beach team launch"
+).split()
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep generated created_at values instead of auto_now_add."""
+    fields = [model._meta.get_field('created_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate a synthetic social graph for benchmarking. Follower counts and "
+        "post popularity follow a power law. The first user gets the password "
+        "'benchmark' so benchmark_endpoints can log in as them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--likes', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--notifications', type=int, default=20000)
+        parser.add_argument('--moods', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=365, help="Spread timestamps over this many days.")
+        parser.add_argument('--exponent', type=float, default=1.1, help="Power-law exponent for popularity.")
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.span = timedelta(days=options['days']).total_seconds()
+        self.prefix = prefix = options['prefix']
+
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"Users prefixed '{prefix}_' already exist; pick another --prefix.")
+
+        with explicit_timestamps(Post, Comment, Notification, Follow, MoodEntry):
+            user_ids = self.create_users(prefix, options['users'])
+            user_weights = self.power_law_weights(len(user_ids), options['exponent'])
+            follows = self.create_follows(user_ids, user_weights, options['follows'])
+            posts = self.create_posts(user_ids, user_weights, options['posts'])
+            post_weights = self.power_law_weights(len(posts), options['exponent'])
+            self.create_likes(user_ids, posts, post_weights, options['likes'])
+            self.create_comments(user_ids, posts, post_weights, options['comments'])
+            self.create_notifications(user_ids, posts, post_weights, options['notifications'])
+            self.create_moods(user_ids, options['moods'])
+
+        call_command('recount_post_counters', stdout=self.stdout)
+        call_command('recount_follow_counters', stdout=self.stdout)
+        # After the recount, so accounts over the fan-out limit are left to read-time merging.
+        self.create_timelines(follows)
+        call_command('rebuild_mood_rollups', stdout=self.stdout)
+        if search_available():
+            call_command('rebuild_search_index', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS("Dataset generated."))
+
+    def power_law_weights(self, count, exponent):
+        # Cumulative weights over a shuffled rank order, ready for random.choices.
+        ranks = list(range(1, count + 1))
+        self.rng.shuffle(ranks)
+        return list(itertools.accumulate(1 / rank ** exponent for rank in ranks))
+
+    def timestamp(self):
+        return self.now - timedelta(seconds=self.rng.random() * self.span)
+
+    def sentence(self, length):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(length))
+
+    def bulk_insert(self, model, objects):
+        total = 0
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+        self.stdout.write(f"  {model.__name__}: {total}")
+
+    def create_users(self, prefix, count):
+        password = make_password('benchmark')
+        self.bulk_insert(User, (
+            User(username=f'{prefix}_{i}', email=f'{prefix}_{i}@example.com', password=password if i == 0 else '!')
+            for i in range(count)
+        ))
+        user_ids = list(User.objects.filter(username__startswith=f'{prefix}_').order_by('id').values_list('id', flat=True))
+        self.bulk_insert(Profile, (
+            Profile(user_id=user_id, name=f'{prefix} {i}', contact='0700000000', bio=self.sentence(8))
+            for i, user_id in enumerate(user_ids)
+        ))
+        self.bulk_insert(UserSetting, (UserSetting(user_id=user_id) for user_id in user_ids))
+        return user_ids
+
+    def create_follows(self, user_ids, user_weights, count):
+        pairs = set()
+        # Followers are uniform, followees power-law: a few accounts gather most followers.
+        for _ in range(count * 2):
+            if len(pairs) >= count:
+                break
+            follower = self.rng.choice(user_ids)
+            following = self.rng.choices(user_ids, cum_weights=user_weights)[0]
+            if follower != following:
+                pairs.add((follower, following))
+        self.bulk_insert(Follow, (
+            Follow(follower_id=follower, following_id=following, created_at=self.timestamp())
+            for follower, following in pairs
+        ))
+        return pairs
+
+    def create_posts(self, user_ids, user_weights, count):
+        authors = self.rng.choices(user_ids, cum_weights=user_weights, k=count)
+        timestamps = sorted(self.timestamp() for _ in range(count))
+        self.bulk_insert(Post, (
+            Post(user_id=author, caption=self.sentence(self.rng.randint(3, 30)), created_at=created_at)
+            for author, created_at in zip(authors, timestamps)
+        ))
+        return list(Post.objects.filter(user__username__startswith=f'{self.prefix}_').values_list('id', 'user_id', 'created_at'))
+
+    def create_likes(self, user_ids, posts, post_weights, count):
+        pairs = set()
+        # Each (user, post) can only be liked once; popular posts run out of
+        # new likers first, so draws are capped like the follow graph's.
+        for _ in range(count * 2):
+            if len(pairs) >= count:
+                break
+            pairs.add((self.rng.choice(user_ids), self.rng.choices(posts, cum_weights=post_weights)[0]))
+        if len(pairs) < count:
+            self.stdout.write(self.style.WARNING(f"  Only {len(pairs)} of {count} likes are distinct (user, post) pairs."))
+        self.bulk_insert(Like, (
+            Like(
+                user_id=user_id,
+                post_id=post_id,
+                value='like' if self.rng.random() < 0.85 else 'dislike',
+                created_at=posted_at + (self.now - posted_at) * self.rng.random(),
+            )
+            for user_id, (post_id, _, posted_at) in pairs
+        ))
+
+    def create_comments(self, user_ids, posts, post_weights, count):
+        def comments():
+            for _ in range(count):
+                post_id, _, posted_at = self.rng.choices(posts, cum_weights=post_weights)[0]
+                created_at = posted_at + (self.now - posted_at) * self.rng.random()
+                yield Comment(user_id=self.rng.choice(user_ids), post_id=post_id, text=self.sentence(6), created_at=created_at)
+
+        self.bulk_insert(Comment, comments())
+
+    def create_notifications(self, user_ids, posts, post_weights, count):
+        # Bulk inserts here can't ignore conflicts: the notification ids are
+        # needed for their NotificationActor rows.
+        total = actors_total = 0
+        for batch in batched(range(count), self.batch_size):
+            notifications, actor_indexes = [], []
+            for _ in batch:
+                post_id, author_id, posted_at = self.rng.choices(posts, cum_weights=post_weights)[0]
+                verb = self.rng.choice(list(VERB_PHRASES))
+                # Newest first, as notify() keeps them; authors aren't notified of their own activity.
+                size = self.rng.randint(1, 50)
+                candidates = self.rng.sample(range(len(user_ids)), min(size + 1, len(user_ids)))
+                actors = [i for i in candidates if user_ids[i] != author_id][:size]
+                if not actors:
+                    continue
+                latest_actors = [f'{self.prefix}_{i}' for i in actors[:3]]
+                notifications.append(Notification(
+                    recipient_id=author_id,
+                    actor_id=user_ids[actors[0]],
+                    post_id=post_id,
+                    verb=verb,
+                    actor_count=len(actors),
+                    latest_actors=latest_actors,
+                    message=format_message(latest_actors, len(actors), verb),
+                    created_at=posted_at + (self.now - posted_at) * self.rng.random(),
+                    is_read=self.rng.random() < 0.7,
+                ))
+                actor_indexes.append(actors)
+            with transaction.atomic():
+                Notification.objects.bulk_create(notifications)
+                # Oldest actor first, so the newest gets the highest id as in notify().
+                actor_rows = [
+                    NotificationActor(notification_id=notification.pk, actor_id=user_ids[i])
+                    for notification, actors in zip(notifications, actor_indexes)
+                    for i in reversed(actors)
+                ]
+                NotificationActor.objects.bulk_create(actor_rows, batch_size=self.batch_size)
+            total += len(notifications)
+            actors_total += len(actor_rows)
+        self.stdout.write(f"  Notification: {total}")
+        self.stdout.write(f"  NotificationActor: {actors_total}")
+
+    def create_timelines(self, follows):
+        # Each follow backfills the followee's recent posts, as a real follow does.
+        for batch in batched(follows, self.batch_size):
+            with transaction.atomic():
+                for follower, following in batch:
+                    backfill_timeline(User(pk=follower), User(pk=following))
+        self.stdout.write(f"  TimelineEntry: {TimelineEntry.objects.filter(owner__username__startswith=f'{self.prefix}_').count()}")
+
+    def create_moods(self, user_ids, count):
+        self.bulk_insert(MoodEntry, (
+            MoodEntry(user_id=self.rng.choice(user_ids), mood=self.rng.choice(MOODS), created_at=self.timestamp())
+            for _ in range(count)
+        ))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bondup_core.purges import BATCH_SIZE, PAUSE_SECONDS, Purger
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove soft-deleted posts and accounts with everything that hangs off them, "
+        "in small transactions so other writers are not stalled. Run it from cron, or "
+        "as a long-lived worker with --interval."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Rows deleted per transaction.")
+        parser.add_argument('--pause', type=float, default=PAUSE_SECONDS, help="Seconds to yield the write lock between batches.")
+        parser.add_argument('--interval', type=float, help="Keep running, checking for deletions this many seconds apart.")
+
+    def handle(self, *args, **options):
+        purger = Purger(options['batch_size'], options['pause'])
+        while True:
+            accounts, posts = purger.purge_deleted()
+            if accounts or posts or not options['interval']:
+                self.stdout.write(self.style.SUCCESS(f"Purged {accounts} accounts and {posts} posts."))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from bondup_core.moods import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-day mood rollups from MoodEntry. Needed after bulk writes "
+        "that bypass record_mood (bulk_create, raw imports)."
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} mood rollup rows."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from bondup_core import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Repopulate the full-text search indexes from the post and profile tables. "
+        "Needed after bulk writes that bypass model signals (bulk_create, update)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=['posts', 'profiles'], help="Rebuild just one index.")
+
+    def handle(self, *args, **options):
+        if not search.search_available():
+            raise CommandError("Full-text search needs SQLite FTS5.")
+
+        indexes = {'posts': search.POST_INDEX, 'profiles': search.PROFILE_INDEX}
+        if options['only']:
+            indexes = {options['only']: indexes[options['only']]}
+
+        for label, index in indexes.items():
+            with transaction.atomic():
+                count = search.rebuild_index(index)
+            self.stdout.write(f"  {label}: {count}")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bondup_core.counters import recount_follow_counters
+from bondup_core.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Recompute Profile followers/following counters from the Follow table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help="Only recount these users.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = Profile.objects.order_by('pk')
+        if options['usernames']:
+            queryset = queryset.filter(user__username__in=options['usernames'])
+
+        # Walk the table in pk ranges so each write transaction stays short.
+        total = 0
+        last_pk = 0
+        while True:
+            pks = list(queryset.filter(pk__gt=last_pk).values_list('pk', flat=True)[:options['batch_size']])
+            if not pks:
+                break
+            with transaction.atomic():
+                total += recount_follow_counters(Profile.objects.filter(pk__in=pks))
+            last_pk = pks[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Recounted {total} profiles."))
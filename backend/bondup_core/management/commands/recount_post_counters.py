@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bondup_core.counters import recount_post_counters
+from bondup_core.models import Post
+
+
+class Command(BaseCommand):
+    help = "Recompute Post like/dislike/comment counters from the underlying rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('post_ids', nargs='*', type=int, help="Only recount these posts.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.order_by('pk')
+        if options['post_ids']:
+            queryset = queryset.filter(pk__in=options['post_ids'])
+
+        # Walk the table in pk ranges so each write transaction stays short.
+        checked = corrected = 0
+        last_pk = 0
+        while True:
+            pks = list(queryset.filter(pk__gt=last_pk).values_list('pk', flat=True)[:options['batch_size']])
+            if not pks:
+                break
+            with transaction.atomic():
+                corrected += recount_post_counters(Post.objects.filter(pk__in=pks))
+            checked += len(pks)
+            last_pk = pks[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Recounted {checked} posts, corrected {corrected}."))
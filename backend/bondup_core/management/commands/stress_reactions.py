@@ -0,0 +1,106 @@
+import logging
+import random
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from bondup_core.counters import adjust_post_counters
+from bondup_core.models import Like, Post
+from bondup_core.reactions import react, unreact
+
+
+def legacy_react(user, post_id, value):
+    """The read-then-write path LikeDislikeView used before the upsert."""
+    with transaction.atomic():
+        like, created = Like.objects.select_for_update().get_or_create(
+            user=user, post_id=post_id, defaults={'value': value}
+        )
+        if created:
+            adjust_post_counters(post_id, **{f'{value}_count': 1})
+        elif like.value != value:
+            adjust_post_counters(post_id, **{f'{like.value}_count': -1, f'{value}_count': 1})
+            like.value = value
+            like.save(update_fields=['value'])
+
+
+def legacy_unreact(user, post_id):
+    with transaction.atomic():
+        like = Like.objects.filter(user=user, post_id=post_id).first()
+        if like:
+            like.delete()
+            adjust_post_counters(post_id, **{f'{like.value}_count': -1})
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one hot post with reactions from many threads, two per user so double taps "
+        "race, then check the post's counters against the Like table. Runs the old "
+        "get_or_create path and the upsert. Needs a file-backed database; the fixture users "
+        "are removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--taps', type=int, default=50, help="Reactions sent by each thread.")
+        parser.add_argument('--prefix', default='reaction_stress')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError("Every thread needs its own connection; use a file-backed database.")
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"Users prefixed '{prefix}_' already exist; pick another --prefix.")
+        logging.getLogger('bondup_core.performance').disabled = True
+
+        threads = options['threads']
+        author = User.objects.create_user(username=f'{prefix}_author')
+        User.objects.bulk_create(
+            User(username=f'{prefix}_{i}', password='!') for i in range((threads + 1) // 2)
+        )
+        fans = list(User.objects.filter(username__startswith=f'{prefix}_').exclude(pk=author.pk).order_by('pk'))
+
+        self.stdout.write(f"{'path':<9}{'taps':>8}{'seconds':>9}{'errors':>8}  counters (likes/dislikes) vs Like rows")
+        try:
+            for label, do_react, do_unreact in (('legacy', legacy_react, legacy_unreact), ('upsert', react, unreact)):
+                post = Post.objects.create(user=author, caption='hot')
+                errors = []
+
+                def tap(index):
+                    user, rng = fans[index // 2], random.Random(index)
+                    try:
+                        for _ in range(options['taps']):
+                            choice = rng.choice(['like', 'like', 'dislike', None])
+                            try:
+                                if choice is None:
+                                    do_unreact(user, post.id)
+                                else:
+                                    do_react(user, post.id, choice)
+                            except Exception as exc:
+                                errors.append(type(exc).__name__)
+                    finally:
+                        connection.close()
+
+                workers = [threading.Thread(target=tap, args=(i,)) for i in range(threads)]
+                started = time.perf_counter()
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                elapsed = time.perf_counter() - started
+
+                post.refresh_from_db()
+                likes = Like.objects.filter(post=post)
+                counted = (post.like_count, post.dislike_count)
+                actual = (likes.filter(value='like').count(), likes.filter(value='dislike').count())
+                verdict = 'ok' if counted == actual else 'DRIFT'
+                summary = ', '.join(f'{errors.count(name)} {name}' for name in sorted(set(errors)))
+                self.stdout.write(
+                    f"{label:<9}{threads * options['taps']:>8}{elapsed:>9.2f}{len(errors):>8}  "
+                    f"{counted[0]}/{counted[1]} vs {actual[0]}/{actual[1]} {verdict}"
+                    + (f"  ({summary})" if summary else '')
+                )
+        finally:
+            User.objects.filter(username__startswith=f'{prefix}_').delete()
@@ -0,0 +1,106 @@
+import heapq
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Metrics for the request being handled, or None when it was not sampled.
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class RequestMetrics:
+    def __init__(self, keep_queries=5):
+        self.keep_queries = keep_queries
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.view_started = None
+        self.view_time = 0.0
+        self.slowest = []  # min-heap of (duration, sql), bounded to keep_queries
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.query_count += 1
+            self.db_time += duration
+            if len(self.slowest) < self.keep_queries:
+                heapq.heappush(self.slowest, (duration, sql))
+            elif duration > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (duration, sql))
+
+    def slowest_queries(self):
+        return sorted(self.slowest, reverse=True)
+
+
+def record_current_query(execute, sql, params, many, context):
+    """Connection execute wrapper that reports to whichever request is current.
+
+    It stays installed on the connection rather than being pushed per
+    request, so it also sees queries the async ORM runs on a worker thread:
+    ``sync_to_async`` carries ``current_metrics`` across with the context.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+@contextmanager
+def serializing():
+    """Count the enclosed block as serializer time for the current request."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - started
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_current_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_current_query)
+
+
+class ViewStats:
+    """Rolling per-view window of request timings, shared by all threads in the process."""
+
+    def __init__(self, window=500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+
+    def record(self, view_name, total_ms, db_ms, query_count):
+        with self._lock:
+            self._samples[view_name].append((total_ms, db_ms, query_count))
+
+    def snapshot(self):
+        with self._lock:
+            samples = {view: list(entries) for view, entries in self._samples.items()}
+        stats = {}
+        for view, entries in samples.items():
+            totals = [total for total, _, _ in entries]
+            stats[view] = {
+                'count': len(entries),
+                'p50_ms': round(percentile(totals, 0.50), 3),
+                'p95_ms': round(percentile(totals, 0.95), 3),
+                'p99_ms': round(percentile(totals, 0.99), 3),
+                'mean_db_ms': round(sum(db for _, db, _ in entries) / len(entries), 3),
+                'mean_queries': round(sum(queries for _, _, queries in entries) / len(entries), 2),
+            }
+        return stats
+
+
+view_stats = ViewStats()
@@ -0,0 +1,150 @@
+import logging
+import random
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.functional import LazyObject, empty
+
+from .metrics import RequestMetrics, current_metrics, install_query_recorder, view_stats
+from .routers import SAFE_METHODS, pin_to_primary, replica_configured
+
+logger = logging.getLogger('bondup_core.performance')
+
+
+class RequestMetricsMiddleware:
+    """Per-request query count and DB/serializer/view time.
+
+    Only a ``REQUEST_METRICS_SAMPLE_RATE`` fraction of requests is measured;
+    the rest pay a context-variable lookup per query. Sampled requests feed
+    the per-view rolling aggregates and are logged with their slowest SQL
+    when they cross ``REQUEST_METRICS_SLOW_MS`` or ``REQUEST_METRICS_SLOW_QUERIES``.
+    The figures go out as a ``Server-Timing`` header only under DEBUG or to
+    staff users; serializer time is what views wrap in ``metrics.serializing``.
+
+    Works in both handler modes, so async views under ASGI are not pushed
+    back onto a thread by this middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 1.0)
+        self.slow_ms = getattr(settings, 'REQUEST_METRICS_SLOW_MS', 500)
+        self.slow_queries = getattr(settings, 'REQUEST_METRICS_SLOW_QUERIES', 50)
+        if self.sample_rate > 0:
+            connection_created.connect(install_query_recorder, dispatch_uid='bondup_core.install_query_recorder')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate > 0 and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        # Connections opened before the signal was connected.
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    def finish(self, request, response, metrics, started):
+        total = time.perf_counter() - started
+        if metrics.view_started is not None:
+            metrics.view_time = time.perf_counter() - metrics.view_started
+
+        if self.exposes_timing(request):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.query_count} queries"',
+                f'serialize;dur={metrics.serializer_time * 1000:.2f}',
+                f'view;dur={metrics.view_time * 1000:.2f}',
+                f'total;dur={total * 1000:.2f}',
+            ])
+
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        view_stats.record(view_name, total * 1000, metrics.db_time * 1000, metrics.query_count)
+
+        if total * 1000 >= self.slow_ms or metrics.query_count >= self.slow_queries:
+            logger.warning(
+                "Slow request %s %s (%s): %.1fms, %d queries, %.1fms in db\n%s",
+                request.method, request.path, view_name, total * 1000, metrics.query_count, metrics.db_time * 1000,
+                '\n'.join(f"  {duration * 1000:.2f}ms  {sql}" for duration, sql in metrics.slowest_queries()),
+            )
+        return response
+
+    def exposes_timing(self, request):
+        if settings.DEBUG:
+            return True
+        user = getattr(request, 'user', None)
+        if isinstance(user, LazyObject) and user._wrapped is empty:
+            # Nothing authenticated this request; don't load a session just for a header.
+            return False
+        return user is not None and user.is_staff
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
+
+
+class PrimaryPinningMiddleware:
+    """After a successful write, pin the user's reads to the primary for a moment (see routers.py)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self.pin(request, response)
+        return response
+
+    def pin(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+        # DRF copies the user it authenticated, by whichever class, onto the
+        # HttpRequest; a lazy user nobody evaluated means nobody authenticated.
+        user = getattr(request, 'user', None)
+        if isinstance(user, LazyObject) and user._wrapped is empty:
+            return
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:43
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Post = apps.get_model('bondup_core', 'Post')
+    Like = apps.get_model('bondup_core', 'Like')
+    Comment = apps.get_model('bondup_core', 'Comment')
+
+    def count(queryset):
+        counts = queryset.filter(post=OuterRef('pk')).order_by().values('post').annotate(n=Count('id')).values('n')
+        return Coalesce(Subquery(counts), Value(0))
+
+    Post.objects.update(
+        like_count=count(Like.objects.filter(value='like')),
+        dislike_count=count(Like.objects.filter(value='dislike')),
+        comment_count=count(Comment.objects.all()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bondup_core', '0015_moodentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='dislike_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
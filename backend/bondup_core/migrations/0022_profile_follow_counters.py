@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:53
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Profile = apps.get_model('bondup_core', 'Profile')
+    Follow = apps.get_model('bondup_core', 'Follow')
+
+    def count(field):
+        counts = Follow.objects.filter(**{field: OuterRef('user')}).order_by().values(field).annotate(n=Count('id')).values('n')
+        return Coalesce(Subquery(counts), Value(0))
+
+    Profile.objects.update(followers_count=count('following'), following_count=count('follower'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bondup_core', '0021_post_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
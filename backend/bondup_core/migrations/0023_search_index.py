@@ -0,0 +1,38 @@
+from django.db import migrations
+
+POST_INDEX = 'bondup_core_post_fts'
+PROFILE_INDEX = 'bondup_core_profile_fts'
+TOKENIZER = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4'"
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends run without search.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"CREATE VIRTUAL TABLE {POST_INDEX} USING fts5(caption, {TOKENIZER})")
+    schema_editor.execute(f"CREATE VIRTUAL TABLE {PROFILE_INDEX} USING fts5(name, bio, professional_info, {TOKENIZER})")
+    # Persist the column weights so plain ``ORDER BY rank`` favours names over bios.
+    schema_editor.execute(f"INSERT INTO {PROFILE_INDEX}({PROFILE_INDEX}, rank) VALUES ('rank', 'bm25(10.0, 1.0, 2.0)')")
+    schema_editor.execute(f"INSERT INTO {POST_INDEX}(rowid, caption) SELECT id, caption FROM bondup_core_post")
+    schema_editor.execute(
+        f"INSERT INTO {PROFILE_INDEX}(rowid, name, bio, professional_info) "
+        f"SELECT user_id, name, bio, professional_info FROM bondup_core_profile"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {POST_INDEX}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {PROFILE_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bondup_core', '0022_profile_follow_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bondup_core', '0023_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='usersetting',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
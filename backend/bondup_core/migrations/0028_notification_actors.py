@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_actors(apps, schema_editor):
+    # Only the latest actors were recorded before; older ones in a group
+    # can notify once more.
+    Notification = apps.get_model('bondup_core', 'Notification')
+    NotificationActor = apps.get_model('bondup_core', 'NotificationActor')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    for notification in Notification.objects.exclude(verb='').iterator():
+        actor_ids = {notification.actor_id, *User.objects.filter(username__in=notification.latest_actors).values_list('id', flat=True)}
+        NotificationActor.objects.bulk_create(
+            [NotificationActor(notification_id=notification.id, actor_id=actor_id) for actor_id in actor_ids],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bondup_core', '0027_like_created_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationActor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actors', to='bondup_core.notification')),
+            ],
+            options={
+                'unique_together': {('notification', 'actor')},
+            },
+        ),
+        migrations.RunPython(populate_actors, migrations.RunPython.noop),
+    ]
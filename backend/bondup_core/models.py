@@ -2,6 +2,14 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
+
+
+class LivePostManager(models.Manager):
+    """Posts that have not been deleted."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 
 class Post(models.Model):
@@ -11,7 +19,25 @@ class Post(models.Model):
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     edited = models.BooleanField(default=False)
+    # Denormalized counters, kept in step with Like/Comment writes (see counters.py)
+    like_count = models.PositiveIntegerField(default=0)
+    dislike_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Bumped whenever the serialized representation changes (see post_cache.py)
+    version = models.PositiveIntegerField(default=1)
+    # Set when the author deletes the post; purge_deleted removes it later (see purges.py)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    # Deleted posts are invisible through ``objects``; ``all_objects`` still sees them.
+    objects = LivePostManager()
+    all_objects = models.Manager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='post_user_recent_idx'),
+            models.Index(fields=['-created_at', '-id'], name='post_recent_idx'),
+            models.Index(fields=['deleted_at'], condition=models.Q(deleted_at__isnull=False), name='post_deleted_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username}'s post"
@@ -29,6 +55,18 @@ class Profile(models.Model):
     ], blank=True)
     name = models.CharField(max_length=50, blank=False)
     professional_info = models.TextField(blank=True)
+    # Denormalized from Follow, maintained by toggle_follow (see counters.py)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    # Validator for conditional GETs of the profile; counters above don't touch it.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set when the user deletes their account; purge_deleted removes it later (see purges.py)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at'], condition=models.Q(deleted_at__isnull=False), name='profile_deleted_idx'),
+        ]
 
     def __str__(self):
         return self.user.username
@@ -36,21 +74,28 @@ class Profile(models.Model):
 
 # Signal to create Profile automatically for new users
 @receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
+def create_or_update_user_profile(sender, instance, created, update_fields=None, **kwargs):
     from .models import Profile
     if created:
         Profile.objects.create(user=instance)
-    else:
-        instance.profile.save()
+    elif update_fields is None or set(update_fields) - {'last_login'}:
+        # GET profile/ serves user fields too, so bump its validator. A full
+        # save of a loaded profile would write back stale follow counters.
+        Profile.objects.filter(user=instance).update(updated_at=timezone.now())
 
 
 class Like(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes')
     value = models.CharField(max_length=7, choices=[('like', 'Like'), ('dislike', 'Dislike')])
+    # When the user first reacted; flipping the reaction keeps it (see reactions.py)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['post', 'value'], name='like_post_value_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -60,21 +105,56 @@ class Comment(models.Model):
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.user.username} on Post {self.post.id}"
 
 class Notification(models.Model):
+    VERB_CHOICES = [
+        ('like', 'Like'),
+        ('dislike', 'Dislike'),
+        ('comment', 'Comment'),
+    ]
+
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    # Most recent actor; earlier ones are summarized in latest_actors/actor_count
     actor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='actor')
     post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True, blank=True)
+    verb = models.CharField(max_length=20, choices=VERB_CHOICES, blank=True)
+    actor_count = models.PositiveIntegerField(default=1)
+    latest_actors = models.JSONField(default=list, blank=True)
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     is_self = models.BooleanField(default=False)
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', 'post', 'verb', '-created_at'], name='notification_group_idx'),
+            models.Index(fields=['recipient', 'is_read', 'created_at'], name='notification_unread_idx'),
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notification_recent_idx'),
+        ]
+
 
     def __str__(self):
         return f"Notification for {self.recipient.username}: {self.message}"
+
+
+class NotificationActor(models.Model):
+    """Every distinct actor folded into a coalesced notification."""
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='actors')
+    actor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        unique_together = ('notification', 'actor')
+
+    def __str__(self):
+        return f"{self.actor.username} in notification {self.notification_id}"
+
     
 class Follow(models.Model):
     follower = models.ForeignKey(User, related_name='following', on_delete=models.CASCADE)
@@ -83,15 +163,39 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ('follower', 'following')
+        indexes = [
+            models.Index(fields=['following', 'created_at'], name='follow_following_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.follower.username} follows {self.following.username}"
-    
+
+
+class TimelineEntry(models.Model):
+    """A post materialized into a follower's "following" timeline (fan-out on write)."""
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    # Copy of post.created_at so the timeline can be range-scanned without a join
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('owner', 'post')
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post'], name='timeline_owner_recent_idx'),
+            models.Index(fields=['owner', 'author'], name='timeline_owner_author_idx'),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in {self.owner.username}'s timeline"
+
+
 class UserSetting(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='settings')
     colorScheme = models.CharField(max_length=20, default='dark')  
     sidebarStyle = models.CharField(max_length=20, default='compact')  
     postDisplay = models.CharField(max_length=20, default='grid')  
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Settings for {self.user.username}"
@@ -110,6 +214,28 @@ class MoodEntry(models.Model):
     mood = models.CharField(max_length=20, choices=MOOD_CHOICES)
     note = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='mood_user_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.created_at} - {self.mood}"
+
+
+class MoodDay(models.Model):
+    """Per-user, per-day count of each mood, kept in step with MoodEntry inserts (see moods.py)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mood_days')
+    day = models.DateField()
+    mood = models.CharField(max_length=20, choices=MoodEntry.MOOD_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also the index analytics use for (user, day range) scans.
+            models.UniqueConstraint(fields=['user', 'day', 'mood'], name='mood_day_unique'),
+        ]
+
     def __str__(self):
-        return f"{self.user.username} - {self.created_at} - {self.mood}"
\ No newline at end of file
+        return f"{self.user.username} - {self.day} - {self.mood}: {self.count}"
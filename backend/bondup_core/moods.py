@@ -0,0 +1,112 @@
+"""Mood logging and analytics over per-day rollups.
+
+Every MoodEntry insert also bumps its ``(user, day, mood)`` row in MoodDay,
+in the same transaction. The analytics below read only those rollups, at
+most one row per mood per day, so a year's dashboard touches a few
+thousand rows however many entries were logged. Days are in TIME_ZONE.
+"""
+from datetime import timedelta
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import MoodDay, MoodEntry
+
+MOODS = [choice for choice, _ in MoodEntry.MOOD_CHOICES]
+PERIODS = ('day', 'week')
+ONE_DAY = timedelta(days=1)
+
+
+def record_mood(user, mood, note=''):
+    with transaction.atomic():
+        entry = MoodEntry.objects.create(user=user, mood=mood, note=note)
+        add_to_rollup(user.id, timezone.localdate(entry.created_at), mood)
+    return entry
+
+
+def add_to_rollup(user_id, day, mood, delta=1):
+    rollup = MoodDay.objects.filter(user_id=user_id, day=day, mood=mood)
+    if rollup.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            MoodDay.objects.create(user_id=user_id, day=day, mood=mood, count=delta)
+    except IntegrityError:
+        # A concurrent insert created the day's row first.
+        rollup.update(count=F('count') + delta)
+
+
+def rollup_rows(entries):
+    """MoodDay field values aggregated from a MoodEntry queryset."""
+    return (
+        entries.annotate(day=TruncDate('created_at')).order_by()
+        .values('user_id', 'day', 'mood').annotate(count=Count('id'))
+    )
+
+
+def rebuild_rollups(batch_size=5000):
+    """Recompute MoodDay from MoodEntry, e.g. after bulk inserts that bypass record_mood.
+
+    One transaction, so readers and ``record_mood`` never see the table
+    half rebuilt; rows are inserted ``batch_size`` at a time as they come
+    off the aggregate query.
+    """
+    total = 0
+    with transaction.atomic():
+        MoodDay.objects.all().delete()
+        rows = rollup_rows(MoodEntry.objects.all()).iterator(chunk_size=batch_size)
+        while batch := [MoodDay(**row) for row in islice(rows, batch_size)]:
+            MoodDay.objects.bulk_create(batch)
+            total += len(batch)
+    return total
+
+
+def distribution(user, start, end):
+    """``{mood: count}`` over ``[start, end]``, zero for moods never logged."""
+    counts = dict(
+        MoodDay.objects.filter(user=user, day__range=(start, end)).order_by()
+        .values('mood').annotate(total=Sum('count')).values_list('mood', 'total')
+    )
+    return {mood: counts.get(mood, 0) for mood in MOODS}
+
+
+def trends(user, start, end, period='day'):
+    """Per-day or per-week (starting Monday) mood counts over ``[start, end]``, oldest first.
+
+    Periods without any entry are left out.
+    """
+    buckets = {}
+    rows = MoodDay.objects.filter(user=user, day__range=(start, end)).values_list('day', 'mood', 'count')
+    for day, mood, count in rows:
+        key = day - timedelta(days=day.weekday()) if period == 'week' else day
+        buckets.setdefault(key, dict.fromkeys(MOODS, 0))[mood] += count
+    return [
+        {'period': key, 'total': sum(moods.values()), 'moods': moods}
+        for key, moods in sorted(buckets.items())
+    ]
+
+
+def current_streak(user, today=None):
+    """``(days, last_day)``: consecutive days with an entry, up to the latest logged day.
+
+    A streak that reached yesterday is still current until today is over.
+    """
+    today = today or timezone.localdate()
+    days = (
+        MoodDay.objects.filter(user=user, day__lte=today)
+        .order_by('-day').values_list('day', flat=True).distinct()
+    )
+    streak, last_day, expected = 0, None, today
+    for day in days.iterator():
+        if last_day is None:
+            if day < today - ONE_DAY:
+                break
+            last_day = expected = day
+        if day != expected:
+            break
+        streak += 1
+        expected = day - ONE_DAY
+    return streak, last_day
@@ -0,0 +1,132 @@
+import json
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, NotificationActor
+from .pubsub import get_broker, notification_channel
+from .serializers import NotificationSerializer
+
+# Activity on the same post is folded into one row while it stays this fresh.
+COALESCE_WINDOW = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', timedelta(hours=24))
+LATEST_ACTORS = 3
+
+VERB_PHRASES = {
+    'like': 'liked your post',
+    'dislike': 'disliked your post',
+    'comment': 'commented on your post',
+}
+
+
+def format_message(latest_actors, actor_count, verb):
+    phrase = VERB_PHRASES[verb]
+    if actor_count == 1:
+        return f"{latest_actors[0]} {phrase}."
+    if actor_count == 2 and len(latest_actors) > 1:
+        return f"{latest_actors[0]} and {latest_actors[1]} {phrase}."
+    others = actor_count - 1
+    return f"{latest_actors[0]} and {others} other{'s' if others != 1 else ''} {phrase}."
+
+
+def publish_notification(notification):
+    data = NotificationSerializer(notification).data
+    message = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    get_broker().publish(notification_channel(notification.recipient_id), message)
+
+
+def notify(recipient, actor, post, verb):
+    """Record ``actor``'s activity, coalescing it per (recipient, post, verb).
+
+    Within ``COALESCE_WINDOW`` a new actor bumps the existing row's count,
+    moves it to the top and marks it unread; an actor who is already part of
+    the group (``NotificationActor``, e.g. commenting again) changes
+    nothing. Written
+    rows are pushed to the recipient's open streams once the transaction
+    commits. Returns the notification that was written, or None for a
+    duplicate.
+    """
+    with transaction.atomic():
+        notification = (
+            Notification.objects.select_for_update()
+            .filter(recipient=recipient, post=post, verb=verb, created_at__gte=timezone.now() - COALESCE_WINDOW)
+            .order_by('-created_at')
+            .first()
+        )
+        if notification is None:
+            notification = Notification.objects.create(
+                recipient=recipient,
+                actor=actor,
+                post=post,
+                verb=verb,
+                latest_actors=[actor.username],
+                message=format_message([actor.username], 1, verb),
+            )
+            NotificationActor.objects.create(notification=notification, actor=actor)
+            transaction.on_commit(partial(publish_notification, notification))
+            return notification
+
+        _, created = NotificationActor.objects.get_or_create(notification=notification, actor=actor)
+        if not created:
+            return None
+
+        notification.actor = actor
+        notification.actor_count += 1
+        notification.latest_actors = [actor.username] + notification.latest_actors[:LATEST_ACTORS - 1]
+        notification.message = format_message(notification.latest_actors, notification.actor_count, verb)
+        notification.created_at = timezone.now()
+        notification.is_read = False
+        notification.save(update_fields=['actor', 'actor_count', 'latest_actors', 'message', 'created_at', 'is_read'])
+        transaction.on_commit(partial(publish_notification, notification))
+        return notification
+
+
+def withdraw(recipient, actor, post, verb):
+    """Take ``actor`` back out of their coalesced notification, e.g. on unreact.
+
+    The count, ``latest_actors`` and message are rebuilt from the remaining
+    ``NotificationActor`` rows, and a notification left with no actors is
+    deleted. The row keeps its place and read state, and nothing is pushed:
+    open streams would move it to the top as if it were new activity.
+    """
+    with transaction.atomic():
+        notification = (
+            Notification.objects.select_for_update()
+            .filter(recipient=recipient, post=post, verb=verb, actors__actor=actor)
+            .order_by('-created_at')
+            .first()
+        )
+        if notification is None:
+            return
+        NotificationActor.objects.filter(notification=notification, actor=actor).delete()
+        _regroup(notification)
+
+
+def withdraw_from(notification_ids, actor_id):
+    """``withdraw`` for one actor across many notifications, e.g. a deleted account's."""
+    with transaction.atomic():
+        notifications = list(Notification.objects.select_for_update().filter(pk__in=notification_ids))
+        NotificationActor.objects.filter(notification_id__in=notification_ids, actor_id=actor_id).delete()
+        for notification in notifications:
+            _regroup(notification)
+
+
+def _regroup(notification):
+    """Rebuild a notification after one actor left it; deleted once nobody is left."""
+    remaining = list(
+        NotificationActor.objects.filter(notification=notification)
+        .select_related('actor')
+        .order_by('-id')[:LATEST_ACTORS]
+    )
+    if not remaining:
+        notification.delete()
+        return
+
+    notification.actor = remaining[0].actor
+    notification.actor_count -= 1
+    notification.latest_actors = [row.actor.username for row in remaining]
+    notification.message = format_message(notification.latest_actors, notification.actor_count, notification.verb)
+    notification.save(update_fields=['actor', 'actor_count', 'latest_actors', 'message'])
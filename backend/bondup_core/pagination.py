@@ -0,0 +1,160 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a unique two-column ordering, e.g. (created_at, id).
+
+    Every page is a single range scan starting at the last row of the
+    previous page, so deep pages cost the same as the first one.
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw:
+            try:
+                page_size = int(raw)
+            except ValueError:
+                pass
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, position):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return self.cursor_position(values, model)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def cursor_position(self, values, model):
+        fields = [model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+        return tuple(field.to_python(value) for field, value in zip(fields, values))
+
+    def filter_after(self, queryset, position, ordering=None):
+        (first, second), (first_value, second_value) = ordering or self.ordering, position
+        lookup = 'lt' if first.startswith('-') else 'gt'
+        first, second = first.lstrip('-'), second.lstrip('-')
+        # The redundant inclusive bound lets the planner turn this into a range scan.
+        return queryset.filter(**{f'{first}__{lookup}e': first_value}).filter(
+            Q(**{f'{first}__{lookup}': first_value})
+            | Q(**{first: first_value, f'{second}__{lookup}': second_value})
+        )
+
+    def get_position(self, obj):
+        return tuple(getattr(obj, name.lstrip('-')) for name in self.ordering)
+
+    def start_page(self, request, model):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        return self.decode_cursor(request, model)
+
+    def finish_page(self, rows, key):
+        """Trim the look-ahead row and remember where the next page starts."""
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = key(rows[-1]) if self.has_next else None
+        return rows
+
+    def page_queryset(self, queryset, position):
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = self.filter_after(queryset, position)
+        return queryset[:self.page_size + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        position = self.start_page(request, queryset.model)
+        return self.finish_page(list(self.page_queryset(queryset, position)), self.get_position)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        position = self.start_page(request, queryset.model)
+        return self.finish_page([obj async for obj in self.page_queryset(queryset, position)], self.get_position)
+
+    def source_querysets(self, sources, position):
+        for queryset, ordering in sources:
+            queryset = queryset.order_by(*ordering)
+            if position is not None:
+                queryset = self.filter_after(queryset, position, ordering)
+            names = [name.lstrip('-') for name in ordering]
+            yield queryset.values_list(*names)[:self.page_size + 1]
+
+    def merge_sources(self, keys):
+        page = sorted(keys, reverse=self.ordering[0].startswith('-'))[:self.page_size + 1]
+        return self.finish_page(page, tuple)
+
+    def paginate_sources(self, sources, request, model):
+        """Page through the union of several querysets sharing one key space.
+
+        ``sources`` is a list of ``(queryset, ordering)`` pairs whose orderings
+        produce values comparable with ``self.ordering`` on ``model``. Each
+        source is range-scanned for at most one page and the results merged,
+        so the cost is bounded by the page size times the number of sources.
+        Returns the page as a list of key tuples.
+        """
+        position = self.start_page(request, model)
+        keys = set()
+        for queryset in self.source_querysets(sources, position):
+            keys.update(queryset)
+        return self.merge_sources(keys)
+
+    async def apaginate_sources(self, sources, request, model):
+        position = self.start_page(request, model)
+        keys = set()
+        for queryset in self.source_querysets(sources, position):
+            keys.update([key async for key in queryset])
+        return self.merge_sources(keys)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class CommentPagination(KeysetPagination):
+    """Comment threads read oldest first."""
+    ordering = ('created_at', 'id')
+
+
+class SearchPagination(KeysetPagination):
+    """Pages through full-text matches by (rank, rowid); see search.py."""
+    ordering = ('rank', 'rowid')
+
+    def cursor_position(self, values, model):
+        return float(values[0]), int(values[1])
+
+    def paginate_matches(self, matches, request):
+        """Page through ``matches(position, limit)``, a callable returning ordered (rank, rowid) pairs.
+
+        Returns the page's rowids.
+        """
+        position = self.start_page(request, None)
+        page = self.finish_page(matches(position, self.page_size + 1), tuple)
+        return [rowid for _, rowid in page]
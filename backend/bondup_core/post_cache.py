@@ -0,0 +1,70 @@
+import threading
+
+from django.core.cache import caches
+from django.db.models import F
+
+from .feeds import post_feed_queryset
+from .metrics import serializing
+from .models import Post
+from .serializers import PostSerializer
+
+CACHE_ALIAS = 'posts'
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+stats = CacheStats()
+
+
+def cache_key(post_id, version):
+    return f'post:{post_id}:v{version}'
+
+
+def bump_post_version(post_id):
+    Post.objects.filter(pk=post_id).update(version=F('version') + 1)
+
+
+def evict_post(post):
+    caches[CACHE_ALIAS].delete(cache_key(post.id, post.version))
+
+
+def serialize_posts(posts):
+    """PostSerializer data for ``posts``, served from the cache where possible.
+
+    ``posts`` only needs ``id`` and ``version`` loaded. Cached entries are
+    fetched with one multi-get; the misses are loaded through the feed
+    queryset, serialized together and written back.
+    """
+    cache = caches[CACHE_ALIAS]
+    keys = {post.id: cache_key(post.id, post.version) for post in posts}
+    entries = cache.get_many(keys.values())
+    missing = [post_id for post_id, key in keys.items() if key not in entries]
+    stats.record(hits=len(keys) - len(missing), misses=len(missing))
+
+    if missing:
+        with serializing():
+            fresh = PostSerializer(post_feed_queryset().filter(id__in=missing), many=True).data
+        fresh = {keys[item['id']]: item for item in fresh}
+        cache.set_many(fresh)
+        entries.update(fresh)
+
+    return [entries[keys[post.id]] for post in posts if keys[post.id] in entries]
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """An open listener on one channel, consumed from the event loop that created it."""
+
+    def __init__(self, broker, channel, max_pending=100):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def deliver(self, message):
+        # Publishers run in worker threads (sync views), so hop onto our loop.
+        try:
+            self.loop.call_soon_threadsafe(self._enqueue, message)
+        except RuntimeError:
+            # The loop is closed (its stream died without cleaning up); a
+            # publisher must never fail because of a dead listener.
+            self.close()
+
+    def _enqueue(self, message):
+        if self.queue.full():
+            # A stalled client only loses its oldest backlog, never blocks publishers.
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Interface between notification writers and open push streams.
+
+    ``publish`` may be called from any thread; ``subscribe`` must be called
+    from a running event loop. An out-of-process implementation (e.g. Redis
+    pub/sub) only has to honour these three methods.
+    """
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    """Delivers to subscribers living in this process only; fine for a single worker and for tests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = getattr(settings, 'PUBSUB_BROKER', 'bondup_core.pubsub.InProcessBroker')
+                _broker = import_string(backend)()
+    return _broker
+
+
+def notification_channel(user_id):
+    return f'notifications:{user_id}'
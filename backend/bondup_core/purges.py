@@ -0,0 +1,160 @@
+"""Soft deletion in the request, batched purging in the background.
+
+Deleting a post or an account used to cascade through likes, comments,
+notifications and timeline entries inside the request, holding SQLite's
+write lock for as long as that took and stalling every other writer. The
+request now only sets ``deleted_at``, which hides the row at once
+(``Post.objects`` skips deleted posts, deleted accounts are deactivated
+and their comments, likes, follows and notifications stop being shown or
+counted).
+``purge_deleted`` then removes the rows and everything hanging off them in
+batches of ``PURGE_BATCH_SIZE`` rows, each in its own short transaction
+followed by a pause at least as long (``PURGE_PAUSE_SECONDS`` minimum) so
+waiting writers get the lock.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .authentication import forget_user
+from .counters import uncount_account
+from .models import (
+    Comment, Follow, Like, MoodDay, MoodEntry, Notification, NotificationActor, Post, Profile, TimelineEntry,
+)
+from .notifications import withdraw_from
+from .post_cache import evict_post
+from .search import unindex_post, unindex_profile, unindex_user_posts
+
+BATCH_SIZE = getattr(settings, 'PURGE_BATCH_SIZE', 500)
+PAUSE_SECONDS = getattr(settings, 'PURGE_PAUSE_SECONDS', 0.01)
+
+
+def hide_post(post):
+    with transaction.atomic():
+        Post.all_objects.filter(pk=post.pk).update(deleted_at=timezone.now())
+        unindex_post(post.pk)
+    evict_post(post)
+    # Following feeds page over timeline entries, so a hidden post's entries
+    # would leave pages short; they go now, in batches, rather than at purge.
+    Purger().delete_in_batches(TimelineEntry.objects.filter(post_id=post.pk))
+
+
+def hide_account(user):
+    """Deactivate the account and hide its profile, posts and activity.
+
+    Each step is a set-based statement: the account, profile and posts are
+    flagged, both search indexes dropped, and the account's reactions,
+    comments and follows taken out of other rows' counters. The account is
+    then taken out of other people's timelines and notifications, in batches.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        Profile.objects.filter(user=user).update(deleted_at=now)
+        uncount_account(user.pk)
+        Post.objects.filter(user=user).update(deleted_at=now)
+        unindex_profile(user.pk)
+        unindex_user_posts(user.pk)
+    # update() sends no signals, so drop the cached row here.
+    forget_user(user.pk)
+    purger = Purger()
+    purger.delete_in_batches(TimelineEntry.objects.filter(author_id=user.pk))
+    purger.withdraw_actor(user.pk)
+
+
+class Purger:
+    """Removes soft-deleted posts and accounts a bounded batch at a time."""
+
+    def __init__(self, batch_size=BATCH_SIZE, pause=PAUSE_SECONDS):
+        self.batch_size = batch_size
+        self.pause = pause
+
+    def delete_in_batches(self, queryset):
+        """Delete ``queryset``, ``batch_size`` rows per transaction; returns the number deleted."""
+        total = 0
+        while True:
+            started = time.monotonic()
+            with transaction.atomic():
+                # Unordered, so the batch is read straight off the filter's index
+                # instead of sorting every matching row while holding the lock.
+                pks = list(queryset.order_by().values_list('pk', flat=True)[:self.batch_size])
+                if not pks:
+                    return total
+                queryset.model._base_manager.filter(pk__in=pks).delete()
+            total += len(pks)
+            # Yield the lock for at least as long as the batch held it, so
+            # writers waiting on the busy timeout get their turn.
+            time.sleep(max(self.pause, time.monotonic() - started))
+
+    def withdraw_actor(self, user_id):
+        """Take the account out of every notification it is folded into, a batch at a time.
+
+        Groups it shares with other actors are rebuilt from theirs rather
+        than deleted, so their activity stays listed.
+        """
+        for notification_ids in self.batches(NotificationActor.objects.filter(actor_id=user_id), 'notification_id'):
+            started = time.monotonic()
+            withdraw_from(notification_ids, user_id)
+            time.sleep(max(self.pause, time.monotonic() - started))
+
+    def batches(self, queryset, field='pk'):
+        """``field`` values from ``queryset`` in batches, re-queried as earlier ones are purged."""
+        while values := list(queryset.order_by(field).values_list(field, flat=True)[:self.batch_size]):
+            yield values
+
+    def purge_post(self, post_id):
+        # A viral post's notifications carry an actor row per fan; those go in
+        # batches of their own so a notification batch never cascades into them.
+        for queryset in (
+            Like.objects.filter(post_id=post_id),
+            Comment.objects.filter(post_id=post_id),
+            NotificationActor.objects.filter(notification__post_id=post_id),
+            Notification.objects.filter(post_id=post_id),
+            TimelineEntry.objects.filter(post_id=post_id),
+        ):
+            self.delete_in_batches(queryset)
+        with transaction.atomic():
+            Post.all_objects.filter(pk=post_id).delete()
+
+    def purge_account(self, user_id):
+        for post_ids in self.batches(Post.all_objects.filter(user_id=user_id)):
+            for post_id in post_ids:
+                self.purge_post(post_id)
+        # Normally done by hide_account already; this catches anything left.
+        self.withdraw_actor(user_id)
+        # The account's activity on other people's posts and profiles; its
+        # counts were already taken out by hide_account.
+        for queryset in (
+            Like.objects.filter(user_id=user_id),
+            Comment.objects.filter(user_id=user_id),
+            Follow.objects.filter(follower_id=user_id),
+            Follow.objects.filter(following_id=user_id),
+            NotificationActor.objects.filter(notification__recipient_id=user_id),
+            Notification.objects.filter(recipient_id=user_id),
+            # Only rows with no actor rows to rebuild from still point here.
+            Notification.objects.filter(actor_id=user_id),
+            TimelineEntry.objects.filter(owner_id=user_id),
+            TimelineEntry.objects.filter(author_id=user_id),
+            MoodEntry.objects.filter(user_id=user_id),
+            MoodDay.objects.filter(user_id=user_id),
+        ):
+            self.delete_in_batches(queryset)
+        # Only single rows (profile, settings) are left to cascade.
+        with transaction.atomic():
+            User.objects.filter(pk=user_id).delete()
+
+    def purge_deleted(self):
+        """Purge every soft-deleted account and post; returns ``(accounts, posts)`` purged."""
+        accounts = posts = 0
+        for user_ids in self.batches(Profile.objects.filter(deleted_at__isnull=False), 'user_id'):
+            for user_id in user_ids:
+                self.purge_account(user_id)
+                accounts += 1
+        for post_ids in self.batches(Post.all_objects.filter(deleted_at__isnull=False)):
+            for post_id in post_ids:
+                self.purge_post(post_id)
+                posts += 1
+        return accounts, posts
@@ -0,0 +1,59 @@
+"""Reaction writes as single statements.
+
+``react`` inserts or flips the user's reaction with one
+``INSERT ... ON CONFLICT DO UPDATE ... RETURNING``, so concurrent double
+taps are settled by the unique constraint inside the database instead of
+surfacing as IntegrityError. The update only fires when the value
+changes: repeating a reaction returns no row and everything downstream
+(counters, cache version, notification) is skipped.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .counters import adjust_post_counters
+from .models import Like
+
+OPPOSITE = {'like': 'dislike', 'dislike': 'like'}
+TABLE = Like._meta.db_table
+
+# created_at is only written on insert, so comparing it with our timestamp
+# tells a new reaction from a flipped one. The comparison runs in SQL: how
+# the returned column is typed depends on the driver's converters.
+UPSERT_SQL = (
+    f"INSERT INTO {TABLE} (user_id, post_id, value, created_at) VALUES (%s, %s, %s, %s) "
+    f"ON CONFLICT (user_id, post_id) DO UPDATE SET value = excluded.value "
+    f"WHERE {TABLE}.value <> excluded.value "
+    f"RETURNING created_at = %s"
+)
+DELETE_SQL = f"DELETE FROM {TABLE} WHERE user_id = %s AND post_id = %s RETURNING value"
+
+
+def react(user, post_id, value):
+    """Set ``user``'s reaction on the post.
+
+    Returns ``'created'`` or ``'flipped'``, or None if it already was ``value``.
+    """
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(UPSERT_SQL, [user.id, post_id, value, now, now])
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        if row[0]:
+            adjust_post_counters(post_id, **{f'{value}_count': 1})
+            return 'created'
+        adjust_post_counters(post_id, **{f'{OPPOSITE[value]}_count': -1, f'{value}_count': 1})
+    return 'flipped'
+
+
+def unreact(user, post_id):
+    """Remove ``user``'s reaction; returns the removed value, or None if there was none."""
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(DELETE_SQL, [user.id, post_id])
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        adjust_post_counters(post_id, **{f'{row[0]}_count': -1})
+    return row[0]
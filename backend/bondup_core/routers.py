@@ -0,0 +1,102 @@
+"""Primary/replica database routing with read-your-writes stickiness.
+
+Writes always go to ``default``. Reads go to the ``replica`` alias only
+inside ``replica_reads()``, which the listing and stats views enter for
+safe requests (see ``ReplicaReadsMixin``), and only when the user has not
+written within ``DATABASE_REPLICA_PIN_SECONDS``; a user who just posted or
+liked something reads it back from the primary rather than a lagging
+replica. Without a ``replica`` entry in ``DATABASES`` everything stays on
+``default``.
+
+Pins live in the ``DATABASE_REPLICA_PIN_CACHE`` cache (``replica_pins``),
+which has to be shared between the web nodes for stickiness to hold behind
+a load balancer; set ``REPLICA_PIN_CACHE_REDIS_URL`` for that. Users are
+pinned and checked by their authenticated ``request.user``, JWT or DRF
+token alike, and are always looked up on the primary (see authentication.py).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+PRIMARY_ALIAS = 'default'
+REPLICA_ALIAS = 'replica'
+PIN_SECONDS = getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5)
+PIN_CACHE = getattr(settings, 'DATABASE_REPLICA_PIN_CACHE', 'replica_pins')
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# True while the current request may read from the replica.
+reading_from_replica = ContextVar('reading_from_replica', default=False)
+
+
+def pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    caches[PIN_CACHE].set(pin_key(user_id), True, PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return caches[PIN_CACHE].get(pin_key(user_id)) is not None
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def replica_allowed(request):
+    """Whether an authenticated request may read from the replica."""
+    if request.method not in SAFE_METHODS or not replica_configured():
+        return False
+    user = getattr(request, 'user', None)
+    return not (user is not None and user.is_authenticated and is_pinned(user.pk))
+
+
+@contextmanager
+def replica_reads(request):
+    """Route reads inside the block to the replica, unless the request writes or its user is pinned.
+
+    ``request.user`` must already be authenticated.
+    """
+    token = reading_from_replica.set(replica_allowed(request))
+    try:
+        yield
+    finally:
+        reading_from_replica.reset(token)
+
+
+class ReplicaReadsMixin:
+    """For APIViews whose GETs may be served from the replica.
+
+    The replica is chosen once DRF has authenticated the request, whichever
+    authentication class matched, so authentication itself reads the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        token = reading_from_replica.set(False)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            reading_from_replica.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        reading_from_replica.set(replica_allowed(request))
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return REPLICA_ALIAS if reading_from_replica.get() else PRIMARY_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives schema changes through replication.
+        return db == PRIMARY_ALIAS
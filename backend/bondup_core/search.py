@@ -0,0 +1,135 @@
+"""Full-text search over post captions and profiles, backed by SQLite FTS5.
+
+Each index is an FTS5 table holding its own copy of the searchable text,
+keyed by rowid: the post id for posts and the user id for profiles. Rows
+are kept current from save/delete signals (see signals.py); bulk writes
+that skip signals are caught up with ``rebuild_search_index``.
+
+A query only touches the index pages for its terms. Scoring is the
+expensive part, so only the newest ``SEARCH_RANK_WINDOW`` matches are
+ranked: FTS5 walks a term's rowids in order and stops there, which keeps
+common words as cheap as rare ones however large the tables grow. Older
+matches beyond the window are never returned; ``truncated`` tells the
+caller when that happened, so clients can ask for a narrower query.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection, connections, router
+
+from .models import Post
+
+POST_INDEX = 'bondup_core_post_fts'
+PROFILE_INDEX = 'bondup_core_profile_fts'
+
+POST_FIELDS = ('caption',)
+PROFILE_FIELDS = ('name', 'bio', 'professional_info')
+
+RANK_WINDOW = getattr(settings, 'SEARCH_RANK_WINDOW', 1000)
+
+# Used by the rebuild command to fill the indexes from scratch; deleted rows stay out.
+POPULATE_SQL = {
+    POST_INDEX: f"INSERT INTO {POST_INDEX}(rowid, caption) SELECT id, caption FROM bondup_core_post WHERE deleted_at IS NULL",
+    PROFILE_INDEX: (
+        f"INSERT INTO {PROFILE_INDEX}(rowid, name, bio, professional_info) "
+        f"SELECT user_id, name, bio, professional_info FROM bondup_core_profile WHERE deleted_at IS NULL"
+    ),
+}
+
+
+def search_available():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query: every word must match, the last as a prefix.
+
+    Words are quoted, so FTS5 operators typed by users are searched for literally.
+    """
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"' for term in terms) + '*'
+
+
+def _replace(index, rowid, fields, values):
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {index} WHERE rowid = %s", [rowid])
+        columns = ', '.join(fields)
+        placeholders = ', '.join(['%s'] * len(fields))
+        cursor.execute(f"INSERT INTO {index}(rowid, {columns}) VALUES (%s, {placeholders})", [rowid, *values])
+
+
+def _remove(index, rowid):
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {index} WHERE rowid = %s", [rowid])
+
+
+def index_post(post):
+    _replace(POST_INDEX, post.id, POST_FIELDS, [post.caption])
+
+
+def unindex_post(post_id):
+    _remove(POST_INDEX, post_id)
+
+
+def unindex_user_posts(user_id):
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {POST_INDEX} WHERE rowid IN (SELECT id FROM {Post._meta.db_table} WHERE user_id = %s)",
+            [user_id],
+        )
+
+
+def index_profile(profile):
+    _replace(PROFILE_INDEX, profile.user_id, PROFILE_FIELDS, [getattr(profile, field) for field in PROFILE_FIELDS])
+
+
+def unindex_profile(user_id):
+    _remove(PROFILE_INDEX, user_id)
+
+
+def rebuild_index(index):
+    """Repopulate ``index`` from its source table in one statement; returns the row count."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {index}")
+        cursor.execute(POPULATE_SQL[index])
+        count = cursor.rowcount
+        cursor.execute(f"INSERT INTO {index}({index}) VALUES ('optimize')")
+    return count
+
+
+def search(index, expression, position, limit):
+    """Up to ``limit`` ``(rank, rowid)`` matches, best first, after ``position``.
+
+    Ties on rank are broken by rowid so ``(rank, rowid)`` is a usable cursor.
+    """
+    # The LIMIT keeps the inner query from being flattened, so the cursor
+    # filter below applies to the ranked window rather than the whole index.
+    sql = (
+        f"SELECT rank, rowid FROM ("
+        f"SELECT rank, rowid FROM {index} WHERE {index} MATCH %s ORDER BY rowid DESC LIMIT %s"
+        f")"
+    )
+    params = [expression, RANK_WINDOW]
+    if position is not None:
+        sql += " WHERE rank > %s OR (rank = %s AND rowid > %s)"
+        params += [position[0], position[0], position[1]]
+    sql += " ORDER BY rank, rowid LIMIT %s"
+    with connections[router.db_for_read(Post)].cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
+
+
+def truncated(index, expression):
+    """Whether ``expression`` matches more rows than ``search`` ranks."""
+    sql = f"SELECT 1 FROM {index} WHERE {index} MATCH %s ORDER BY rowid DESC LIMIT 1 OFFSET %s"
+    with connections[router.db_for_read(Post)].cursor() as cursor:
+        cursor.execute(sql, [expression, RANK_WINDOW])
+        return cursor.fetchone() is not None
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Post, Like, Comment, Follow, Notification, Profile, UserSetting
+from .feeds import bump_posts_showing
+from .models import Post, Like, Comment, Follow, MoodEntry, Notification, Profile, UserSetting
 
 
 class CommentSerializer(serializers.ModelSerializer): 
@@ -14,19 +15,24 @@ class CommentSerializer(serializers.ModelSerializer):
 class PostSerializer(serializers.ModelSerializer): 
     likes = serializers.SerializerMethodField()
     dislikes = serializers.SerializerMethodField()
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
+    comment_count = serializers.IntegerField(read_only=True)
 
     user_username = serializers.CharField(source='user.username', read_only=True)
 
     class Meta:
         model = Post
-        fields = ['id', 'user', 'caption', 'image', 'created_at', 'likes', 'dislikes', 'comments', 'edited', 'user_username']
+        fields = ['id', 'user', 'caption', 'image', 'created_at', 'likes', 'dislikes', 'comments', 'comment_count', 'edited', 'user_username']
 
     def get_likes(self, obj):
-        return obj.likes.filter(value='like').count()
+        return obj.like_count
 
     def get_dislikes(self, obj):
-        return obj.likes.filter(value='dislike').count()
+        return obj.dislike_count
+
+    def get_comments(self, obj):
+        # A preview of the latest comments, oldest first; see feeds.post_feed_queryset.
+        return CommentSerializer(reversed(obj.latest_comments), many=True).data
     
     def get_image(self, obj):
         request = self.context.get('request')
@@ -49,20 +55,26 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'bio', 'contact', 'gender', 'name', 'professional_info']
 
     def update(self, instance, validated_data):
-     
-        instance.username = validated_data.get('username', instance.username)
-        instance.email = validated_data.get('email', instance.email)
-        instance.save()
+        # Only the submitted columns are written: the profile row also holds
+        # follow counters that toggle_follow moves concurrently.
+        user_fields = [attr for attr in ['username', 'email'] if attr in validated_data]
+        renamed = 'username' in validated_data and validated_data['username'] != instance.username
+        for attr in user_fields:
+            setattr(instance, attr, validated_data[attr])
+        if user_fields:
+            instance.save(update_fields=user_fields)
+        if renamed:
+            # Cached post payloads carry the author's and commenters' usernames.
+            bump_posts_showing(instance.pk)
 
-        
         profile_data = validated_data.get('profile', {})
         profile = getattr(instance, 'profile', None)
 
-        if profile:
-            for attr in ['bio', 'contact', 'gender', 'name', 'professional_info']:
-                if attr in profile_data:
-                    setattr(profile, attr, profile_data[attr])
-            profile.save()
+        if profile and profile_data:
+            profile_fields = [attr for attr in ['bio', 'contact', 'gender', 'name', 'professional_info'] if attr in profile_data]
+            for attr in profile_fields:
+                setattr(profile, attr, profile_data[attr])
+            profile.save(update_fields=[*profile_fields, 'updated_at'])
 
         return instance
 
@@ -95,9 +107,8 @@ class RegisterSerializer(serializers.ModelSerializer):
         )
         return user
 
-class UserProfileSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = User
+class UserProfileSerializer(UserSerializer):
+    class Meta(UserSerializer.Meta):
         fields = ['username', 'email', 'name', 'bio', 'contact', 'gender', 'professional_info']
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -107,28 +118,26 @@ class FollowSerializer(serializers.ModelSerializer):
 
 class NotificationSerializer(serializers.ModelSerializer):
     actor = serializers.CharField(source='actor.username', read_only=True)
-    post_id = serializers.SerializerMethodField()
+    # Read straight from the FK column so the post row is never loaded
+    post_id = serializers.IntegerField(read_only=True)
     is_self = serializers.SerializerMethodField()
-    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = Notification
-        fields = ['id', 'message', 'post_id', 'created_at', 'actor', 'is_self', 'is_read']
-
-    def get_post_id(self, obj):
-        return obj.post.id if obj.post else None
+        fields = ['id', 'message', 'post_id', 'created_at', 'actor', 'verb', 'actor_count', 'latest_actors', 'is_self', 'is_read']
 
     def get_is_self(self, obj):
         request = self.context.get('request')
-        return obj.actor == request.user if request else False
-
-    def get_is_read(self, obj):
-        request = self.context.get('request')
-        # You may want to store read/unread state separately in your model.
-        return obj.actor == request.user if request else False
+        return obj.actor_id == request.user.id if request else False
     
 class UserSettingSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserSetting
         fields = ['colorScheme', 'sidebarStyle', 'postDisplay']
 
+
+class MoodEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MoodEntry
+        fields = ['id', 'mood', 'note', 'created_at']
+        read_only_fields = ['id', 'created_at']
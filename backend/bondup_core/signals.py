@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile, UserSetting
+from .authentication import forget_user
+from .models import Post, Profile, UserSetting
+from .search import POST_FIELDS, PROFILE_FIELDS, index_post, index_profile, unindex_post, unindex_profile
 
 
 @receiver(post_save, sender=User)
@@ -12,4 +14,38 @@ def create_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def create_user_setting(sender, instance, created, **kwargs):
     if created:
-        UserSetting.objects.create(user=instance)
\ No newline at end of file
+        UserSetting.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def forget_user_of_changed_profile(sender, instance, **kwargs):
+    forget_user(instance.user_id)
+
+
+def touches(update_fields, fields):
+    return update_fields is None or not set(update_fields).isdisjoint(fields)
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, update_fields, **kwargs):
+    if instance.deleted_at is None and touches(update_fields, POST_FIELDS):
+        index_post(instance)
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    unindex_post(instance.id)
+
+@receiver(post_save, sender=Profile)
+def index_saved_profile(sender, instance, update_fields, **kwargs):
+    if instance.deleted_at is None and touches(update_fields, PROFILE_FIELDS):
+        index_profile(instance)
+
+@receiver(post_delete, sender=Profile)
+def unindex_deleted_profile(sender, instance, **kwargs):
+    unindex_profile(instance.user_id)
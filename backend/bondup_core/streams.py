@@ -0,0 +1,80 @@
+import asyncio
+import secrets
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .pubsub import get_broker, notification_channel
+
+KEEPALIVE_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_KEEPALIVE', 15)
+TICKET_CACHE = getattr(settings, 'NOTIFICATION_STREAM_TICKET_CACHE', 'stream_tickets')
+TICKET_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_TICKET_SECONDS', 30)
+
+
+def ticket_key(ticket):
+    return f'stream-ticket:{ticket}'
+
+
+def issue_ticket(user_id):
+    """A random, single-use ticket that opens one stream for the user within ``TICKET_SECONDS``."""
+    ticket = secrets.token_urlsafe(32)
+    caches[TICKET_CACHE].set(ticket_key(ticket), user_id, TICKET_SECONDS)
+    return ticket
+
+
+async def redeem_ticket(ticket):
+    """The user id the ticket was issued to, or None; a ticket is only accepted once."""
+    if not ticket:
+        return None
+    cache, key = caches[TICKET_CACHE], ticket_key(ticket)
+    user_id = await cache.aget(key)
+    # Only the request whose delete removed the key gets the stream.
+    if user_id is None or not await cache.adelete(key):
+        return None
+    return user_id
+
+
+async def notification_events(channel):
+    subscription = get_broker().subscribe(channel)
+    try:
+        yield ': connected\n\n'
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield f'event: notification\ndata: {message}\n\n'
+    finally:
+        subscription.close()
+
+
+@require_GET
+async def notification_stream(request):
+    """Server-sent events carrying the user's notifications as they are written.
+
+    Only served under ASGI (bondup_backend.asgi); each open stream holds a
+    subscription on the pub/sub broker rather than a worker thread. Under
+    WSGI the endless response would pin a worker thread per open page, so
+    clients get a 501 and poll ``notifications/unread-count/`` instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Notification streaming needs the ASGI server.'}, status=501)
+    # EventSource cannot send headers. Rather than the access token, whose
+    # query string would land in access logs, it carries a short-lived
+    # single-use ticket from notifications/stream/ticket/.
+    user_id = await redeem_ticket(request.GET.get('ticket'))
+    if user_id is None:
+        return JsonResponse({'detail': 'A valid stream ticket is required.'}, status=401)
+
+    response = StreamingHttpResponse(
+        notification_events(notification_channel(user_id)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
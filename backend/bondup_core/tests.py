@@ -1,3 +1,1117 @@
-from django.test import TestCase
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import random
+import re
+import threading
+import unittest
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import checks, moods, routers, search
+from .authentication import CachedJWTAuthentication
+from .benchmarks import SCENARIOS, BenchmarkContext, missing_scenarios, run_scenario
+from .counters import adjust_post_counters, recount_follow_counters, recount_post_counters
+from .feeds import post_feed_queryset
+from .metrics import view_stats
+from .models import (
+    Comment, Follow, Like, MoodDay, MoodEntry, Notification, NotificationActor, Post, Profile, TimelineEntry,
+)
+from .notifications import notify, withdraw
+from .pubsub import get_broker, notification_channel
+from .purges import Purger, hide_account
+from .serializers import PostCreateSerializer
+from .timeline import fan_out_post, fanning_out_inline, finish_fan_out
+
+
+class PostFeedQueryCountTests(TestCase):
+    def setUp(self):
+        caches['posts'].clear()
+        self.user = User.objects.create_user(username='alice')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_posts(self, count):
+        for i in range(count):
+            author = User.objects.create_user(username=f'author{Post.objects.count()}')
+            post = Post.objects.create(user=author, caption=f'post {i}')
+            Like.objects.create(user=self.user, post=post, value='like')
+            Comment.objects.create(user=author, post=post, text='first')
+            Comment.objects.create(user=self.user, post=post, text='second')
+            recount_post_counters(Post.objects.filter(pk=post.pk))
+
+    def test_home_feed_query_count_is_constant(self):
+        # Page keys, uncached posts, their comments, the viewer's reactions.
+        self.create_posts(1)
+        with self.assertNumQueries(4):
+            small = self.client.get('/api/posts/')
+        self.create_posts(15)
+        with self.assertNumQueries(4):
+            large = self.client.get('/api/posts/')
+        self.assertEqual(len(small.data['results']), 1)
+        self.assertEqual(len(large.data['results']), 16)
+        self.assertEqual(large.data['results'][0]['likes'], 1)
+        self.assertEqual(large.data['results'][0]['comments'][1]['user'], 'alice')
+
+    def test_cached_page_skips_post_queries(self):
+        self.create_posts(5)
+        self.client.get('/api/posts/')
+        with self.assertNumQueries(2):
+            cached = self.client.get('/api/posts/')
+        self.assertEqual(len(cached.data['results']), 5)
+
+    def test_reaction_invalidates_cached_post(self):
+        self.create_posts(1)
+        post = Post.objects.get()
+        self.client.get('/api/posts/')
+        response = self.client.post(f'/api/posts/{post.id}/like/', {'value': 'dislike'}, format='json')
+        self.assertEqual((response.data['dislikes'], response.data['my_reaction']), (1, 'dislike'))
+        listed = self.client.get('/api/posts/').data['results'][0]
+        self.assertEqual((listed['dislikes'], listed['my_reaction']), (1, 'dislike'))
+
+
+class PostCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice')
+        self.author = User.objects.create_user(username='bob')
+        self.post = Post.objects.create(user=self.author, caption='hello')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def counts(self):
+        return Post.all_objects.filter(pk=self.post.pk).values_list('like_count', 'dislike_count', 'comment_count').get()
+
+    def test_reactions_and_comments_keep_counters_in_step(self):
+        self.client.post(f'/api/posts/{self.post.id}/like/', {'value': 'like'}, format='json')
+        self.client.post(f'/api/posts/{self.post.id}/like/', {'value': 'dislike'}, format='json')
+        first = self.client.post(f'/api/posts/{self.post.id}/comment/', {'text': 'one'}, format='json').data
+        second = self.client.post(f'/api/posts/{self.post.id}/comment/', {'text': 'two'}, format='json').data
+        self.assertEqual(self.counts(), (0, 1, 2))
+
+        self.client.delete(f'/api/posts/{self.post.id}/comment/', {'comment_id': first['id']}, format='json')
+        self.client.delete(f'/api/comments/{second["id"]}/delete/')
+        self.client.delete(f'/api/posts/{self.post.id}/like/')
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+    def test_edit_does_not_overwrite_concurrent_writes(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        is_valid = PostCreateSerializer.is_valid
+
+        def like_and_delete_meanwhile(serializer, *args, **kwargs):
+            adjust_post_counters(self.post.id, like_count=1)
+            Post.objects.filter(pk=self.post.pk).update(deleted_at=timezone.now())
+            return is_valid(serializer, *args, **kwargs)
+
+        with mock.patch.object(PostCreateSerializer, 'is_valid', autospec=True, side_effect=like_and_delete_meanwhile):
+            response = client.put(f'/api/posts/{self.post.id}/', {'caption': 'edited'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        post = Post.all_objects.get(pk=self.post.pk)
+        self.assertEqual((post.caption, post.edited, post.like_count), ('edited', True, 1))
+        self.assertIsNotNone(post.deleted_at)
+
+    def test_recount_repairs_drift(self):
+        Like.objects.create(user=self.user, post=self.post, value='like')
+        Comment.objects.create(user=self.user, post=self.post, text='hi')
+        Post.objects.update(like_count=7, dislike_count=3)
+        in_step = Post.objects.create(user=self.author, caption='untouched')
+        out = StringIO()
+        call_command('recount_post_counters', stdout=out)
+        self.assertEqual(self.counts(), (1, 0, 1))
+        self.assertIn('Recounted 2 posts, corrected 1.', out.getvalue())
+        versions = dict(Post.objects.values_list('pk', 'version'))
+        self.assertEqual((versions[self.post.pk], versions[in_step.pk]), (self.post.version + 1, in_step.version))
+
+
+class FollowCounterTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice')
+        self.bob = User.objects.create_user(username='bob')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def counts(self, user):
+        return Profile.objects.filter(user=user).values_list('followers_count', 'following_count').get()
+
+    def test_follow_and_unfollow_move_both_sides(self):
+        client = self.client_for(self.alice)
+        self.assertEqual(client.post('/api/follow/bob/').status_code, 201)
+        self.assertEqual((self.counts(self.alice), self.counts(self.bob)), ((0, 1), (1, 0)))
+        self.assertEqual(client.post('/api/follow/bob/').status_code, 200)
+        self.assertEqual((self.counts(self.alice), self.counts(self.bob)), ((0, 0), (0, 0)))
+
+    def test_profile_edits_do_not_write_back_stale_counters(self):
+        self.bob.profile  # loaded before alice follows, as a cached user would be
+        client = self.client_for(self.bob)
+        self.client_for(self.alice).post('/api/follow/bob/')
+        for url in ('/api/update-profile/', '/api/profile/'):
+            response = client.put(url, {'bio': 'hi', 'email': 'bob@example.com'}, format='json')
+            self.assertEqual(response.status_code, 200, url)
+        self.bob.save()
+        self.assertEqual(self.counts(self.bob), (1, 0))
+        self.assertEqual(Profile.objects.get(user=self.bob).bio, 'hi')
+        self.assertEqual(self.client_for(self.alice).post('/api/follow/bob/').status_code, 200)
+        self.assertEqual(self.counts(self.bob), (0, 0))
+
+    def test_recount_repairs_drift(self):
+        Follow.objects.create(follower=self.alice, following=self.bob)
+        Profile.objects.update(followers_count=5, following_count=5)
+        call_command('recount_follow_counters', stdout=StringIO())
+        self.assertEqual((self.counts(self.alice), self.counts(self.bob)), ((0, 1), (1, 0)))
+
+
+class BulkFollowLookupTests(TestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user(username='alice')
+        self.others = [User.objects.create_user(username=name) for name in ('bob', 'carol', 'dave')]
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+        for user in self.others[:2]:
+            self.client.post(f'/api/follow/{user.username}/')
+        Follow.objects.create(follower=self.others[0], following=self.others[1])
+        recount_follow_counters()
+
+    def test_follow_status_for_many_users_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/follow-status/bulk/', {'usernames': 'bob,dave,nobody,carol'})
+        self.assertEqual(response.data, {'bob': True, 'dave': False, 'nobody': False, 'carol': True})
+
+    def test_follow_status_caps_the_batch(self):
+        usernames = ','.join(f'user{i}' for i in range(150))
+        self.assertEqual(len(self.client.get('/api/follow-status/bulk/', {'usernames': usernames}).data), 100)
+
+    def test_follow_stats_for_many_users_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/follow-stats/bulk/', {'usernames': 'bob,carol,nobody'})
+        self.assertEqual(response.data, {
+            'bob': {'followers': 1, 'following': 1},
+            'carol': {'followers': 2, 'following': 0},
+        })
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        caches['posts'].clear()
+        self.user = User.objects.create_user(username='alice')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.posts = [Post.objects.create(user=self.user, caption=f'post {i}') for i in range(5)]
+
+    def walk(self, url):
+        ids = []
+        while url:
+            page = self.client.get(url).data
+            ids += [post['id'] for post in page['results']]
+            url = page['next']
+        return ids
+
+    def test_cursor_is_stable_while_new_posts_arrive(self):
+        first = self.client.get('/api/posts/', {'page_size': 2}).data
+        Post.objects.create(user=self.user, caption='newer')
+        ids = [post['id'] for post in first['results']] + self.walk(first['next'])
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+
+    def test_ties_on_created_at_are_broken_by_id(self):
+        Post.objects.update(created_at=timezone.now())
+        self.assertEqual(self.walk('/api/posts/?page_size=2'), [post.id for post in reversed(self.posts)])
+
+    def test_invalid_cursor_is_not_found(self):
+        encode = lambda value: base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+        for cursor in ('not-base64!', encode({'at': 1}), encode([1]), encode(['yesterday', 1])):
+            self.assertEqual(self.client.get('/api/posts/', {'cursor': cursor}).status_code, 404, cursor)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        caches['posts'].clear()
+        self.user = User.objects.create_user(username='alice')
+        self.staff = User.objects.create_user(username='admin', is_staff=True)
+        Post.objects.create(user=self.user, caption='hello')
+        self.client = APIClient()
+
+    def get_posts(self, user):
+        self.client.force_authenticate(user)
+        return self.client.get('/api/posts/')
+
+    def test_server_timing_is_only_sent_to_staff(self):
+        timing = self.get_posts(self.staff)['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertGreater(float(re.search(r'serialize;dur=([\d.]+)', timing).group(1)), 0)
+        self.assertNotIn('Server-Timing', self.get_posts(self.user))
+
+    @override_settings(DEBUG=True)
+    def test_server_timing_is_sent_to_everyone_under_debug(self):
+        self.assertIn('Server-Timing', self.get_posts(self.user))
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self):
+        with mock.patch.object(view_stats, 'record') as record:
+            response = self.get_posts(self.staff)
+        self.assertNotIn('Server-Timing', response)
+        record.assert_not_called()
+
+    def test_sampled_requests_feed_view_stats(self):
+        with mock.patch.object(view_stats, 'record') as record:
+            self.get_posts(self.user)
+        self.assertEqual(record.call_args.args[0], 'posts')
+
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        caches['posts'].clear()
+        self.user = User.objects.create_user(username='alice')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(user=self.user, caption='busy', comment_count=5)
+        for i in range(5):
+            Comment.objects.create(user=self.user, post=self.post, text=f'c{i}')
+
+    def test_feed_embeds_latest_comments_only(self):
+        listed = self.client.get('/api/posts/').data['results'][0]
+        self.assertEqual([c['text'] for c in listed['comments']], ['c2', 'c3', 'c4'])
+        self.assertEqual(listed['comment_count'], 5)
+
+    def test_comments_endpoint_pages_oldest_first(self):
+        texts, url = [], f'/api/posts/{self.post.id}/comments/?page_size=2'
+        while url:
+            with self.assertNumQueries(2):
+                page = self.client.get(url).data
+            texts += [c['text'] for c in page['results']]
+            url = page['next']
+        self.assertEqual(texts, ['c0', 'c1', 'c2', 'c3', 'c4'])
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "search is backed by SQLite FTS5")
+class SearchTests(TestCase):
+    def setUp(self):
+        caches['posts'].clear()
+        self.user = User.objects.create_user(username='alice')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, **params):
+        return self.client.get('/api/search/', params).data
+
+    def test_posts_are_indexed_on_save_and_delete(self):
+        post = Post.objects.create(user=self.user, caption='Morning coffee')
+        self.assertEqual([p['id'] for p in self.search(q='coff')['results']], [post.id])
+        post.caption = 'Evening tea'
+        post.save()
+        self.assertEqual(self.search(q='coffee')['results'], [])
+        post.delete()
+        self.assertEqual(self.search(q='tea')['results'], [])
+
+    def test_results_are_ranked_and_paginated(self):
+        weak = Post.objects.create(user=self.user, caption='coffee and a long walk along the river at dawn')
+        strong = Post.objects.create(user=self.user, caption='coffee coffee')
+        other = Post.objects.create(user=self.user, caption='coffee with a friend')
+        first = self.search(q='coffee', page_size=2)
+        second = self.client.get(first['next']).data
+        ids = [p['id'] for p in first['results'] + second['results']]
+        self.assertEqual(ids, [strong.id, other.id, weak.id])
+        self.assertIsNone(second['next'])
+
+    def test_people_rank_names_above_bios(self):
+        bio_match = User.objects.create_user(username='bob')
+        bio_match.profile.bio = 'photographer'
+        bio_match.profile.save()
+        name_match = User.objects.create_user(username='carol')
+        name_match.profile.name = 'Photographer Carol'
+        name_match.profile.save()
+        usernames = [p['username'] for p in self.search(q='photographer', type='people')['results']]
+        self.assertEqual(usernames, ['carol', 'bob'])
+
+    def test_query_syntax_is_not_interpreted(self):
+        Post.objects.create(user=self.user, caption='NEAR the sea')
+        self.assertEqual(len(self.search(q='"NEAR(')['results']), 1)
+
+    def test_matches_beyond_the_rank_window_are_flagged(self):
+        posts = [Post.objects.create(user=self.user, caption=f'coffee {i}') for i in range(3)]
+        with mock.patch('bondup_core.search.RANK_WINDOW', 2):
+            page = self.search(q='coffee')
+            self.assertEqual({p['id'] for p in page['results']}, {posts[1].id, posts[2].id})
+            self.assertTrue(page['truncated'])
+        self.assertFalse(self.search(q='coffee')['truncated'])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        caches['posts'].clear()
+        self.user = User.objects.create_user(username='alice')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def revalidate(self, url):
+        etag = self.client.get(url)['ETag']
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_feed_page_is_not_resent(self):
+        post = Post.objects.create(user=self.user, caption='hello')
+        etag = self.client.get('/api/posts/')['ETag']
+        # Only the page-key query runs; nothing is serialized.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.client.post(f'/api/posts/{post.id}/like/', {'value': 'like'}, format='json')
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['results'][0]['my_reaction']), (200, 'like'))
+
+    def test_renaming_refreshes_cached_posts(self):
+        other = User.objects.create_user(username='bob')
+        post = Post.objects.create(user=other, caption='hello')
+        self.client.post(f'/api/posts/{post.id}/comment/', {'text': 'hi'}, format='json')
+        etag = self.client.get('/api/posts/')['ETag']
+        self.client.put('/api/profile/', {'username': 'alicia'}, format='json')
+
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['comments'][0]['user'], 'alicia')
+
+    def test_profile_settings_and_stats(self):
+        for url in ('/api/profile/', '/api/settings/', '/api/follow-stats/'):
+            self.assertEqual(self.revalidate(url).status_code, 304, url)
+
+        etag = self.client.get('/api/profile/')['ETag']
+        self.user.email = 'alice@example.com'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/profile/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get('/api/settings/')['Last-Modified']
+        response = self.client.get('/api/settings/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+
+class AsyncReadViewTests(TestCase):
+    pairs = [
+        ('/api/posts/', '/api/async/posts/'),
+        ('/api/feed/following/', '/api/async/feed/following/'),
+        ('/api/notifications/', '/api/async/notifications/'),
+        ('/api/profile/', '/api/async/profile/'),
+        ('/api/follow-stats/', '/api/async/follow-stats/'),
+        ('/api/follow-stats/bob/', '/api/async/follow-stats/bob/'),
+    ]
+
+    def setUp(self):
+        caches['posts'].clear()
+        self.user = User.objects.create_user(username='alice')
+        bob = User.objects.create_user(username='bob')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/follow/bob/')
+        post = Post.objects.create(user=bob, caption='hello')
+        fan_out_post(post)
+        Comment.objects.create(user=self.user, post=post, text='hi')
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.user, bob, post, 'like')
+        self.token = str(AccessToken.for_user(self.user))
+
+    async def test_async_views_match_sync_views(self):
+        for sync_url, async_url in self.pairs:
+            expected = await sync_to_async(lambda: self.client.get(sync_url).json())()
+            response = await AsyncClient().get(async_url, headers={'Authorization': f'Bearer {self.token}'})
+            self.assertEqual(response.status_code, 200, async_url)
+            self.assertEqual(response.json(), expected, async_url)
+            self.assertEqual(len(expected.get('results', [None])), 1, sync_url)
+
+    async def test_requires_a_valid_token(self):
+        response = await AsyncClient().get('/api/async/posts/', headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_missing_profile_is_created_like_the_sync_view(self):
+        await Profile.objects.filter(user=self.user).adelete()
+        response = await AsyncClient().get('/api/async/profile/', headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['username'], 'alice')
+        expected = await sync_to_async(lambda: self.client.get('/api/profile/').json())()
+        self.assertEqual(response.json(), expected)
+        self.assertEqual(await Profile.objects.filter(user=self.user).acount(), 1)
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        caches['posts'].clear()
+        self.author = User.objects.create_user(username='bob')
+        self.followers = [User.objects.create_user(username=f'fan{i}') for i in range(5)]
+        for follower in self.followers:
+            Follow.objects.create(follower=follower, following=self.author)
+        self.client = APIClient()
+
+    def timeline(self, user):
+        return list(TimelineEntry.objects.filter(owner=user).order_by('-created_at').values_list('post_id', flat=True))
+
+    def feed(self, user):
+        self.client.force_authenticate(user)
+        return [post['id'] for post in self.client.get('/api/feed/following/').data['results']]
+
+    def test_new_post_is_fanned_out_on_commit_in_batches(self):
+        self.client.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks() as callbacks:
+            post_id = self.client.post('/api/posts/', {'caption': 'hello'}, format='json').data['id']
+        self.assertFalse(TimelineEntry.objects.exists())
+        with mock.patch('bondup_core.timeline.FANOUT_BATCH_SIZE', 2), \
+                mock.patch('bondup_core.timeline.FANOUT_INLINE_BATCHES', 3), \
+                CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT')]), 3)
+        for follower in self.followers:
+            self.assertEqual(self.timeline(follower), [post_id])
+        self.assertEqual(self.timeline(self.author), [])
+
+    def test_large_fan_out_finishes_off_the_request_thread(self):
+        self.client.force_authenticate(self.author)
+        with mock.patch('bondup_core.timeline.FANOUT_BATCH_SIZE', 2), \
+                mock.patch('bondup_core.timeline.get_fanout_executor') as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                post_id = self.client.post('/api/posts/', {'caption': 'hello'}, format='json').data['id']
+            reached = [follower for follower in self.followers if self.timeline(follower)]
+            self.assertEqual(reached, self.followers[:2])
+            executor.return_value.submit.assert_called_once_with(finish_fan_out, mock.ANY, self.followers[1].id)
+            # Run the deferred part here rather than on a worker, which would
+            # close this test's connection.
+            post, after_id = executor.return_value.submit.call_args.args[1:]
+            self.assertIsNone(fan_out_post(post, after_id))
+        for follower in self.followers:
+            self.assertEqual(self.timeline(follower), [post_id])
+
+    def test_inline_fan_out_is_not_handed_off(self):
+        self.client.force_authenticate(self.author)
+        with mock.patch('bondup_core.timeline.FANOUT_BATCH_SIZE', 2), \
+                mock.patch('bondup_core.timeline.get_fanout_executor') as executor:
+            with fanning_out_inline(), self.captureOnCommitCallbacks(execute=True):
+                post_id = self.client.post('/api/posts/', {'caption': 'hello'}, format='json').data['id']
+        executor.assert_not_called()
+        for follower in self.followers:
+            self.assertEqual(self.timeline(follower), [post_id])
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        posts = [Post.objects.create(user=self.author, caption=f'post {i}') for i in range(3)]
+        reader = User.objects.create_user(username='alice')
+        self.client.force_authenticate(reader)
+        self.client.post('/api/follow/bob/')
+        self.assertEqual(self.timeline(reader), [post.id for post in reversed(posts)])
+        self.client.post('/api/follow/bob/')
+        self.assertEqual(self.timeline(reader), [])
+
+    def test_feed_merges_pushed_and_pulled_authors(self):
+        star = User.objects.create_user(username='star')
+        reader = self.followers[0]
+        Follow.objects.create(follower=reader, following=star)
+        Profile.objects.filter(user=self.author).update(followers_count=1)
+        Profile.objects.filter(user=star).update(followers_count=2)
+        with mock.patch('bondup_core.timeline.FANOUT_LIMIT', 1):
+            posts = []
+            for user in (self.author, star, self.author, star):
+                posts.append(Post.objects.create(user=user, caption='hi'))
+                fan_out_post(posts[-1])
+            self.assertEqual(self.timeline(reader), [posts[2].id, posts[0].id])
+            self.assertEqual(self.feed(reader), [post.id for post in reversed(posts)])
+
+
+class CachedUserAuthenticationTests(TestCase):
+    def setUp(self):
+        caches['users'].clear()
+        self.user = User.objects.create_user(username='alice', password='first-secret')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_repeat_requests_skip_the_user_lookup(self):
+        self.client.get('/api/follow-stats/')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/follow-stats/').status_code, 200)
+
+    def test_user_changes_invalidate_the_cached_row(self):
+        self.client.get('/api/follow-stats/')
+        self.user.set_password('second-secret')
+        self.user.save()
+        with self.assertNumQueries(2):
+            self.client.get('/api/follow-stats/')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/follow-stats/').status_code, 401)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class TokenLoginTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='secret-pass')
+
+    def login(self, password):
+        return APIClient().post('/api/auth/login/', {'username': 'alice', 'password': password}, format='json')
+
+    def test_one_read_returns_tokens_user_and_settings(self):
+        # One SELECT for user, profile and settings, one UPDATE for last_login.
+        with mock.patch.object(User, 'check_password', autospec=True, side_effect=User.check_password) as check, \
+                self.assertNumQueries(2):
+            response = self.login('secret-pass')
+        self.assertEqual(check.call_count, 1)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['user']['username'], 'alice')
+        self.assertEqual(body['settings']['colorScheme'], 'dark')
+        feed = APIClient().get('/api/posts/', HTTP_AUTHORIZATION=f"Bearer {body['access']}")
+        self.assertEqual(feed.status_code, 200)
+
+    def test_goes_through_django_authentication(self):
+        logged_in, failed = mock.Mock(), mock.Mock()
+        user_logged_in.connect(logged_in)
+        user_login_failed.connect(failed)
+        self.addCleanup(user_logged_in.disconnect, logged_in)
+        self.addCleanup(user_login_failed.disconnect, failed)
+
+        self.assertEqual(self.login('nope').status_code, 401)
+        self.assertEqual(failed.call_count, 1)
+        self.assertEqual(self.login('secret-pass').status_code, 200)
+        self.assertEqual(logged_in.call_args.kwargs['user'], self.user)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_rejects_inactive_users(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.login('secret-pass').status_code, 401)
+
+
+class MoodAnalyticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.localdate()
+
+    def log_days_ago(self, days, mood):
+        moods.add_to_rollup(self.user.id, self.today - timedelta(days=days), mood)
+
+    def test_logging_updates_the_daily_rollup(self):
+        for mood in ('happy', 'happy', 'sad'):
+            self.assertEqual(self.client.post('/api/moods/', {'mood': mood}, format='json').status_code, 201)
+        self.assertEqual(self.client.post('/api/moods/', {'mood': 'bored'}, format='json').status_code, 400)
+        rollup = dict(MoodDay.objects.filter(user=self.user, day=self.today).values_list('mood', 'count'))
+        self.assertEqual(rollup, {'happy': 2, 'sad': 1})
+        self.assertEqual(len(self.client.get('/api/moods/').json()['results']), 3)
+
+    def test_analytics_read_only_rollups(self):
+        self.log_days_ago(0, 'happy')
+        self.log_days_ago(1, 'sad')
+        self.log_days_ago(1, 'sad')
+        self.log_days_ago(3, 'angry')
+        start = (self.today - timedelta(days=365)).isoformat()
+        with CaptureQueriesContext(connection) as captured:
+            distribution = self.client.get('/api/moods/distribution/', {'start': start}).json()
+            trends = self.client.get('/api/moods/trends/').json()
+            streak = self.client.get('/api/moods/streak/').json()
+        self.assertFalse([q for q in captured.captured_queries if 'bondup_core_moodentry' in q['sql']])
+
+        self.assertEqual(distribution['total'], 4)
+        self.assertEqual(distribution['moods']['sad'], 2)
+        self.assertEqual(distribution['moods']['excited'], 0)
+        self.assertEqual([day['total'] for day in trends['results']], [1, 2, 1])
+        self.assertEqual(streak, {'current_streak': 2, 'last_logged': self.today.isoformat()})
+
+        weeks = self.client.get('/api/moods/trends/', {'period': 'week'}).json()['results']
+        self.assertEqual(sum(week['total'] for week in weeks), 4)
+        self.assertTrue(all(date.fromisoformat(week['period']).weekday() == 0 for week in weeks))
+
+    def test_streak_survives_until_the_day_ends(self):
+        for days in (1, 2, 4):
+            self.log_days_ago(days, 'neutral')
+        self.assertEqual(moods.current_streak(self.user, self.today), (2, self.today - timedelta(days=1)))
+        self.assertEqual(moods.current_streak(self.user, self.today + timedelta(days=1))[0], 0)
+
+    def test_rebuild_replaces_rollups_in_batches(self):
+        for mood in ('happy', 'happy', 'sad', 'angry'):
+            moods.record_mood(self.user, mood)
+        MoodDay.objects.update(count=99)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(moods.rebuild_rollups(batch_size=2), 3)
+        inserts = [q for q in captured.captured_queries if q['sql'].startswith('INSERT INTO "bondup_core_moodday"')]
+        self.assertEqual(len(inserts), 2)
+        rollup = dict(MoodDay.objects.values_list('mood', 'count'))
+        self.assertEqual(rollup, {'happy': 2, 'sad': 1, 'angry': 1})
+
+    def test_rejects_oversized_ranges(self):
+        response = self.client.get('/api/moods/distribution/', {'start': '2020-01-01', 'end': '2024-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AccountExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice')
+        bob = User.objects.create_user(username='bob')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        post = Post.objects.create(user=self.user, caption='mine')
+        for i in range(5):
+            Comment.objects.create(user=self.user, post=post, text=f'comment {i}')
+        Like.objects.create(user=self.user, post=Post.objects.create(user=bob, caption='theirs'), value='like')
+        Follow.objects.create(follower=self.user, following=bob)
+        moods.record_mood(self.user, 'happy')
+
+    def export(self, **query):
+        response = self.client.get('/api/export/', query)
+        self.assertEqual(response.status_code, 200)
+        return response, list(response.streaming_content)
+
+    def test_streams_every_section_as_ndjson(self):
+        response, chunks = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in b''.join(chunks).splitlines()]
+        counts = {}
+        for record in records:
+            counts[record['type']] = counts.get(record['type'], 0) + 1
+        self.assertEqual(
+            counts,
+            {'account': 1, 'settings': 1, 'post': 1, 'comment': 5, 'like': 1, 'following': 1, 'mood': 1},
+        )
+        self.assertEqual(records[0]['username'], 'alice')
+
+    @mock.patch('bondup_core.exports.BUFFER_BYTES', 100)
+    def test_gzip_mode_compresses_the_same_stream(self):
+        _, plain = self.export()
+        response, chunks = self.export(gzip='1')
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(gzip.decompress(b''.join(chunks)), b''.join(plain))
+
+    async def test_streams_asynchronously_under_asgi(self):
+        token = AccessToken.for_user(self.user)
+        response = await AsyncClient().get('/api/export/', headers={'Authorization': f'Bearer {token}'})
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body.splitlines()), 11)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SoftDeleteTests(TestCase):
+    def setUp(self):
+        caches['users'].clear()
+        self.user = User.objects.create_user(username='alice', password='secret-pass')
+        self.bob = User.objects.create_user(username='bob')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.post = Post.objects.create(user=self.user, caption='mine')
+        for i in range(5):
+            Like.objects.create(user=User.objects.create_user(username=f'fan{i}'), post=self.post, value='like')
+        self.bobs_post = Post.objects.create(user=self.bob, caption='theirs')
+        self.client.post(f'/api/posts/{self.bobs_post.id}/like/', {'value': 'like'}, format='json')
+        self.client.post('/api/follow/bob/')
+
+    def test_deleted_post_is_hidden_then_purged_in_batches(self):
+        for fan in User.objects.filter(username__startswith='fan'):
+            notify(self.user, fan, self.post, 'like')
+        TimelineEntry.objects.create(owner=self.bob, post=self.post, author=self.user, created_at=self.post.created_at)
+        self.assertEqual(self.client.delete(f'/api/posts/{self.post.id}/').status_code, 204)
+        self.assertFalse(TimelineEntry.objects.filter(post_id=self.post.id).exists())
+        self.assertEqual(self.client.get('/api/posts/').json()['results'][0]['id'], self.bobs_post.id)
+        self.assertEqual(self.client.get(f'/api/posts/{self.post.id}/comments/').status_code, 404)
+        self.assertEqual(Like.objects.filter(post_id=self.post.id).count(), 5)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(Purger(batch_size=2, pause=0).purge_deleted(), (0, 1))
+        batches = [q for q in captured.captured_queries if q['sql'].startswith('DELETE FROM "bondup_core_like" WHERE "bondup_core_like"."id" IN')]
+        self.assertEqual(len(batches), 3)
+        actor_batches = [q for q in captured.captured_queries if q['sql'].startswith('DELETE FROM "bondup_core_notificationactor" WHERE "bondup_core_notificationactor"."id" IN')]
+        self.assertEqual(len(actor_batches), 3)
+        self.assertFalse(Post.all_objects.filter(pk=self.post.id).exists())
+        self.assertFalse(NotificationActor.objects.filter(notification__post_id=self.post.id).exists())
+        self.assertFalse(Like.objects.filter(post_id=self.post.id).exists())
+
+    def test_deleted_account_is_locked_out_then_purged(self):
+        self.assertEqual(self.client.delete('/api/account/', {'password': 'wrong'}, format='json').status_code, 403)
+        self.assertEqual(self.client.delete('/api/account/', {'password': 'secret-pass'}, format='json').status_code, 204)
+        self.assertEqual(self.client.get('/api/follow-stats/').status_code, 401)
+        self.assertFalse(Post.objects.filter(user=self.user).exists())
+        self.bobs_post.refresh_from_db()
+        self.assertEqual(self.bobs_post.like_count, 0)
+        self.assertEqual(Profile.objects.get(user=self.bob).followers_count, 0)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(Purger(batch_size=2, pause=0).purge_deleted(), (1, 0))
+        self.assertFalse([q for q in captured.captured_queries if q['sql'].startswith('UPDATE')])
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(Post.objects.get(pk=self.bobs_post.pk).like_count, 0)
+
+    def test_hidden_account_disappears_from_counts_comments_follows_and_search(self):
+        viewer = APIClient()
+        viewer.force_authenticate(self.bob)
+        viewer.post('/api/follow/alice/')
+        self.assertTrue(TimelineEntry.objects.filter(author=self.user).exists())
+        self.client.post(f'/api/posts/{self.bobs_post.id}/comment/', {'text': 'nice'}, format='json')
+        viewer.post(f'/api/posts/{self.bobs_post.id}/comment/', {'text': 'thanks'}, format='json')
+        hide_account(self.user)
+
+        self.bobs_post.refresh_from_db()
+        self.assertEqual((self.bobs_post.like_count, self.bobs_post.comment_count), (0, 1))
+        self.assertEqual(Profile.objects.get(user=self.bob).followers_count, 0)
+        if search.search_available():
+            self.assertEqual(search.search(search.POST_INDEX, search.match_expression('mine'), None, 10), [])
+
+        comments = viewer.get(f'/api/posts/{self.bobs_post.id}/comments/').data['results']
+        self.assertEqual([c['text'] for c in comments], ['thanks'])
+        preview = viewer.get('/api/posts/').json()['results'][0]['comments']
+        self.assertEqual([c['text'] for c in preview], ['thanks'])
+        self.assertEqual(viewer.get('/api/follow-stats/alice/').status_code, 404)
+        self.assertEqual(viewer.post('/api/follow/alice/').status_code, 404)
+        self.assertFalse(TimelineEntry.objects.filter(author=self.user).exists())
+
+        # The rows still exist until purged, but a recount leaves them out.
+        self.assertEqual(recount_post_counters(), 0)
+        recount_follow_counters()
+        self.assertEqual(Profile.objects.get(user=self.bob).followers_count, 0)
+
+    def test_hidden_account_is_taken_out_of_shared_notifications(self):
+        fan = User.objects.get(username='fan0')
+        notify(self.bob, fan, self.bobs_post, 'comment')
+        notify(self.bob, self.user, self.bobs_post, 'comment')
+        hide_account(self.user)
+
+        # Alice's like was the only one; the comment group is fan0's again.
+        notification = Notification.objects.get(recipient=self.bob)
+        self.assertEqual((notification.verb, notification.actor, notification.actor_count), ('comment', fan, 1))
+        self.assertEqual(notification.message, 'fan0 commented on your post.')
+
+        Purger(batch_size=2, pause=0).purge_deleted()
+        self.assertEqual(Notification.objects.get(recipient=self.bob).pk, notification.pk)
+
+
+class ReactionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice')
+        self.author = User.objects.create_user(username='bob')
+        self.post = Post.objects.create(user=self.author, caption='hot')
+        self.url = f'/api/posts/{self.post.id}/like/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def react(self, value):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, {'value': value}, format='json').json()
+
+    def test_repeating_a_reaction_is_a_no_op(self):
+        self.assertEqual(self.react('like')['likes'], 1)
+        version = Post.objects.get(pk=self.post.pk).version
+        with CaptureQueriesContext(connection) as captured:
+            body = self.react('like')
+        self.assertEqual((body['likes'], body['my_reaction']), (1, 'like'))
+        self.assertEqual(Post.objects.get(pk=self.post.pk).version, version)
+        self.assertFalse([q for q in captured.captured_queries if 'bondup_core_notification' in q['sql']])
+
+    def test_reacting_loads_the_author_with_the_post(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.react('like')
+        self.assertFalse([q for q in captured.captured_queries if 'FROM "auth_user"' in q['sql']])
+
+    def test_flip_and_unreact(self):
+        self.react('like')
+        body = self.react('dislike')
+        self.assertEqual((body['likes'], body['dislikes'], body['my_reaction']), (0, 1, 'dislike'))
+        self.assertEqual(list(Notification.objects.values_list('verb', flat=True)), ['dislike'])
+
+        body = self.client.delete(self.url).json()
+        self.assertEqual((body['likes'], body['dislikes'], body['my_reaction']), (0, 0, None))
+        self.assertFalse(Like.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(self.client.delete(self.url).json()['dislikes'], 0)
+
+
+class SqliteVersionCheckTests(TestCase):
+    @unittest.skipUnless(connection.vendor == 'sqlite', "only SQLite is checked")
+    def test_sqlite_without_returning_is_reported(self):
+        self.assertEqual(checks.sqlite_supports_returning(None), [])
+        with mock.patch.object(connection.Database, 'sqlite_version_info', (3, 31, 1)):
+            self.assertEqual([error.id for error in checks.sqlite_supports_returning(None)], ['bondup_core.E001'])
+
+
+class ConcurrentReactionTests(TransactionTestCase):
+    # Requests waiting on the write lock would be logged as slow.
+    @mock.patch.object(logging.getLogger('bondup_core.performance'), 'disabled', True)
+    def test_racing_taps_keep_counters_and_notifications_in_step(self):
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(user=author, caption='hot')
+        fans = [User.objects.create_user(username=f'fan{i}') for i in range(4)]
+        url = f'/api/posts/{post.id}/like/'
+        failures = []
+
+        def tap(index):
+            # Two threads per fan, so the same user's taps race each other.
+            client, rng = APIClient(raise_request_exception=False), random.Random(index)
+            client.force_authenticate(fans[index // 2])
+            try:
+                for _ in range(15):
+                    choice = rng.choice(['like', 'like', 'dislike', None])
+                    response = client.delete(url) if choice is None else client.post(url, {'value': choice}, format='json')
+                    if response.status_code != 200:
+                        failures.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=tap, args=(i,)) for i in range(len(fans) * 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(failures, [])
+        post.refresh_from_db()
+        likes = Like.objects.filter(post=post)
+        self.assertEqual(
+            (post.like_count, post.dislike_count),
+            (likes.filter(value='like').count(), likes.filter(value='dislike').count()),
+        )
+        # Every standing reaction, and nothing else, is in its verb's notification.
+        self.assertEqual(
+            set(NotificationActor.objects.values_list('notification__verb', 'actor_id')),
+            set(likes.values_list('value', 'user_id')),
+        )
+        for notification in Notification.objects.annotate(actors_left=Count('actors')):
+            self.assertEqual(notification.actor_count, notification.actors_left)
+
+
+@mock.patch('bondup_core.routers.replica_configured', return_value=True)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        caches[routers.PIN_CACHE].clear()
+        self.user = User.objects.create_user(username='alice')
+        self.auth = f'Bearer {AccessToken.for_user(self.user)}'
+
+    def route(self, method):
+        request = getattr(RequestFactory(), method)('/api/posts/', HTTP_AUTHORIZATION=self.auth)
+        request.user = self.user
+        with routers.replica_reads(request):
+            return routers.PrimaryReplicaRouter().db_for_read(Post)
+
+    def test_safe_reads_use_the_replica(self, _):
+        self.assertEqual(self.route('get'), 'replica')
+        self.assertEqual(self.route('post'), 'default')
+        self.assertEqual(routers.PrimaryReplicaRouter().db_for_read(Post), 'default')
+
+    def test_recent_writer_reads_from_the_primary(self, _):
+        routers.pin_to_primary(self.user.id)
+        self.assertEqual(self.route('get'), 'default')
+
+    def test_writers_are_pinned_whichever_way_they_authenticate(self, _):
+        key = Token.objects.create(user=self.user).key
+        with mock.patch('bondup_core.middleware.replica_configured', return_value=True):
+            for auth in (self.auth, f'Token {key}'):
+                caches[routers.PIN_CACHE].clear()
+                client = APIClient(HTTP_AUTHORIZATION=auth)
+                self.assertEqual(client.post('/api/moods/', {'mood': 'happy'}, format='json').status_code, 201)
+                self.assertTrue(routers.is_pinned(self.user.id), auth)
+
+    def test_token_user_is_read_from_the_primary(self, _):
+        caches['users'].clear()
+        request = RequestFactory().get('/api/posts/', HTTP_AUTHORIZATION=self.auth)
+        with routers.replica_reads(request), CaptureQueriesContext(connection) as queries:
+            user = CachedJWTAuthentication().authenticate(request)[0]
+        self.assertEqual(user, self.user)
+        self.assertEqual(len(queries), 1)
+
+
+class NotificationCoalescingTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner')
+        self.post = Post.objects.create(user=self.owner, caption='hello')
+        self.fans = [User.objects.create_user(username=f'fan{i}') for i in range(5)]
+
+    def test_actors_are_folded_into_one_notification(self):
+        for fan in self.fans[:3]:
+            notify(self.owner, fan, self.post, 'like')
+        notify(self.owner, self.fans[0], self.post, 'comment')
+        notification = Notification.objects.get(verb='like')
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.latest_actors, ['fan2', 'fan1', 'fan0'])
+        self.assertEqual(notification.message, 'fan2 and 2 others liked your post.')
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_repeat_actor_is_not_counted_again(self):
+        for fan in self.fans:
+            notify(self.owner, fan, self.post, 'like')
+        # fan0 has dropped out of latest_actors but is still part of the group.
+        self.assertIsNone(notify(self.owner, self.fans[0], self.post, 'like'))
+        self.assertEqual(Notification.objects.get().actor_count, 5)
+
+    def test_withdrawn_actor_is_taken_out_of_the_group(self):
+        for fan in self.fans[:4]:
+            notify(self.owner, fan, self.post, 'like')
+        withdraw(self.owner, self.fans[3], self.post, 'like')
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor, self.fans[2])
+        self.assertEqual(notification.latest_actors, ['fan2', 'fan1', 'fan0'])
+        self.assertEqual(notification.message, 'fan2 and 2 others liked your post.')
+
+        for fan in self.fans[:3]:
+            withdraw(self.owner, fan, self.post, 'like')
+        self.assertFalse(Notification.objects.exists())
+
+    def test_stale_notification_starts_a_new_group(self):
+        notify(self.owner, self.fans[0], self.post, 'like')
+        Notification.objects.update(created_at=timezone.now() - timedelta(days=2))
+        self.assertIsNotNone(notify(self.owner, self.fans[0], self.post, 'like'))
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class NotificationReadStateTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner')
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        posts = [Post.objects.create(user=self.owner, caption=f'post {i}') for i in range(3)]
+        fan = User.objects.create_user(username='fan')
+        self.notifications = [notify(self.owner, fan, post, 'like') for post in posts]
+        for age, notification in enumerate(reversed(self.notifications)):
+            Notification.objects.filter(pk=notification.pk).update(created_at=timezone.now() - timedelta(minutes=age))
+
+    def unread(self):
+        return self.client.get('/api/notifications/unread-count/').data['unread']
+
+    def test_unread_count_is_per_recipient(self):
+        notify(User.objects.create_user(username='other'), self.owner, self.notifications[0].post, 'comment')
+        self.assertEqual(self.unread(), 3)
+
+    def test_mark_read_stops_at_up_to(self):
+        response = self.client.post('/api/notifications/mark-read/', {'up_to': self.notifications[1].id}, format='json')
+        self.assertEqual(response.data, {'updated': 2})
+        self.assertEqual(self.unread(), 1)
+        self.assertFalse(Notification.objects.get(pk=self.notifications[2].pk).is_read)
+
+    def test_up_to_follows_list_order_when_a_group_moves_up(self):
+        notify(self.owner, User.objects.create_user(username='late'), self.notifications[0].post, 'like')
+        self.client.post('/api/notifications/mark-read/', {'up_to': self.notifications[2].id}, format='json')
+        self.assertEqual(self.unread(), 1)
+        self.assertFalse(Notification.objects.get(pk=self.notifications[0].pk).is_read)
+
+    def test_mark_read_without_up_to_marks_everything(self):
+        self.client.post('/api/notifications/mark-read/', {}, format='json')
+        self.assertEqual(self.unread(), 0)
+        response = self.client.post('/api/notifications/mark-read/', {'up_to': 'newest'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class NotificationPushTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner')
+        self.fan = User.objects.create_user(username='fan')
+        self.post = Post.objects.create(user=self.owner, caption='hello')
+
+    def like_post(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.owner, self.fan, self.post, 'like')
+
+    async def test_new_notification_is_pushed_to_recipient(self):
+        subscription = get_broker().subscribe(notification_channel(self.owner.id))
+        try:
+            await sync_to_async(self.like_post)()
+            message = await asyncio.wait_for(subscription.get(), timeout=1)
+        finally:
+            subscription.close()
+        self.assertEqual(json.loads(message)['message'], 'fan liked your post.')
+
+    def test_closed_loop_subscription_is_dropped_on_publish(self):
+        channel = notification_channel(self.owner.id)
+
+        async def subscribe():
+            return get_broker().subscribe(channel)
+
+        loop = asyncio.new_event_loop()
+        subscription = loop.run_until_complete(subscribe())
+        loop.close()
+        self.like_post()
+        self.assertNotIn(subscription, get_broker()._subscriptions.get(channel, ()))
+
+    def stream_ticket(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        return client.post('/api/notifications/stream/ticket/').json()['ticket']
+
+    def test_stream_is_refused_under_wsgi(self):
+        response = self.client.get('/api/notifications/stream/', {'ticket': self.stream_ticket()})
+        self.assertEqual(response.status_code, 501)
+
+    async def test_stream_ticket_opens_one_stream(self):
+        ticket = await sync_to_async(self.stream_ticket)()
+        response = await AsyncClient().get('/api/notifications/stream/', {'ticket': ticket})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        await response.streaming_content.aclose()
+        response = await AsyncClient().get('/api/notifications/stream/', {'ticket': ticket})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_refuses_access_tokens_and_expired_tickets(self):
+        token = str(AccessToken.for_user(self.owner))
+        response = await AsyncClient().get('/api/notifications/stream/', {'token': token})
+        self.assertEqual(response.status_code, 401)
+        ticket = await sync_to_async(self.stream_ticket)()
+        await caches['stream_tickets'].aclear()
+        response = await AsyncClient().get('/api/notifications/stream/', {'ticket': ticket})
+        self.assertEqual(response.status_code, 401)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite-specific")
+class HotQueryPlanTests(TestCase):
+    """Every feed, notification and follow query must be served by an index."""
+
+    full_scan = re.compile(r'\bSCAN (\w+)\b(?! USING)')
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice')
+        self.post = Post.objects.create(user=self.user, caption='hello')
+
+    def assert_uses_indexes(self, queryset):
+        plan = queryset.explain()
+        scans = [table for table in self.full_scan.findall(plan) if table.startswith('bondup_core_')]
+        self.assertEqual(scans, [], f"full table scan in:\n{plan}")
+
+    def test_post_listings(self):
+        self.assert_uses_indexes(post_feed_queryset().order_by('-created_at', '-id')[:21])
+        self.assert_uses_indexes(post_feed_queryset(Post.objects.filter(user=self.user)).order_by('-created_at', '-id')[:21])
+        self.assert_uses_indexes(Comment.objects.filter(post=self.post).select_related('user').order_by('created_at', 'id')[:21])
+        self.assert_uses_indexes(Like.objects.filter(post=self.post, value='like'))
+
+    def test_notifications(self):
+        notifications = Notification.objects.filter(recipient=self.user)
+        self.assert_uses_indexes(notifications.select_related('actor').order_by('-created_at', '-id')[:21])
+        self.assert_uses_indexes(notifications.filter(is_read=False).values('id'))
+
+    def test_follow_graph(self):
+        self.assert_uses_indexes(Follow.objects.filter(following=self.user).order_by('created_at'))
+        self.assert_uses_indexes(Follow.objects.filter(follower=self.user))
+        self.assert_uses_indexes(TimelineEntry.objects.filter(owner=self.user).order_by('-created_at', '-post_id')[:21])
+
+    def test_mood_history(self):
+        self.assert_uses_indexes(MoodEntry.objects.filter(user=self.user).order_by('-created_at')[:30])
+
+
+class BenchmarkCoverageTests(TestCase):
+    def test_every_url_has_a_benchmark_scenario(self):
+        self.assertEqual(missing_scenarios(), [])
+
+    def test_write_scenarios_time_their_on_commit_work(self):
+        user = User.objects.create_user(username='alice', password='secret-pass')
+        Follow.objects.create(follower=User.objects.create_user(username='fan'), following=user)
+        scenario = next(s for s in SCENARIOS if s.label == 'POST posts')
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as captured:
+            run_scenario(client, BenchmarkContext(user, 'secret-pass'), scenario, iterations=1, warmup=0)
+        self.assertTrue([q for q in captured.captured_queries if q['sql'].startswith('INSERT INTO bondup_core_timelineentry')])
+        self.assertFalse(TimelineEntry.objects.exists())
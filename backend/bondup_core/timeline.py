@@ -0,0 +1,148 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Follow, Post, Profile, TimelineEntry
+
+# Authors with more followers than this are not fanned out on write; their
+# posts are merged into followers' timelines at read time instead.
+FANOUT_LIMIT = getattr(settings, 'TIMELINE_FANOUT_LIMIT', 10000)
+FANOUT_BATCH_SIZE = getattr(settings, 'TIMELINE_FANOUT_BATCH_SIZE', 1000)
+BACKFILL_SIZE = getattr(settings, 'TIMELINE_BACKFILL_SIZE', 100)
+# Batches written before the response goes out; the rest of a large fan-out
+# continues on a background worker.
+FANOUT_INLINE_BATCHES = getattr(settings, 'TIMELINE_FANOUT_INLINE_BATCHES', 1)
+FANOUT_WORKERS = getattr(settings, 'TIMELINE_FANOUT_WORKERS', 2)
+
+logger = logging.getLogger('bondup_core.timeline')
+
+
+def is_pull_author(user_id):
+    return Profile.objects.filter(user_id=user_id, followers_count__gt=FANOUT_LIMIT).exists()
+
+
+def pull_author_ids(viewer):
+    """Accounts the viewer follows whose posts are read on demand."""
+    return list(
+        Follow.objects.filter(follower=viewer, following__profile__followers_count__gt=FANOUT_LIMIT)
+        .values_list('following_id', flat=True)
+    )
+
+
+# Followers are copied in follower_id ranges by the database itself, so no
+# rows are built in Python; each range commits on its own to keep the write
+# lock short. The SELECT needs its WHERE for SQLite to parse ON CONFLICT.
+FANOUT_SQL = (
+    f"INSERT INTO {TimelineEntry._meta.db_table} (owner_id, post_id, author_id, created_at) "
+    f"SELECT follower_id, %s, %s, %s FROM {Follow._meta.db_table} "
+    f"WHERE following_id = %s AND follower_id BETWEEN %s AND %s "
+    f"ON CONFLICT DO NOTHING"
+)
+
+
+def fan_out_post(post, after_id=0, max_batches=None):
+    """Push a new post into every follower's timeline, one transaction per batch.
+
+    Starts after follower ``after_id``. With ``max_batches`` it stops once
+    that many batches are written and returns the last follower id reached
+    if any followers are left; otherwise it returns None.
+    """
+    if is_pull_author(post.user_id):
+        return None
+    created_at = connection.ops.adapt_datetimefield_value(post.created_at)
+    follower_ids = Follow.objects.filter(following_id=post.user_id).order_by('follower_id').values_list('follower_id', flat=True)
+    last_id = after_id
+    written = 0
+    while batch := list(follower_ids.filter(follower_id__gt=last_id)[:FANOUT_BATCH_SIZE]):
+        if written == max_batches:
+            return last_id
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(FANOUT_SQL, [post.id, post.user_id, created_at, post.user_id, batch[0], batch[-1]])
+        last_id = batch[-1]
+        written += 1
+    return None
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_fanout_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='timeline-fanout')
+    return _executor
+
+
+def finish_fan_out(post, after_id):
+    try:
+        fan_out_post(post, after_id)
+    except Exception:
+        logger.exception("Fan-out of post %s stopped after follower %s", post.pk, after_id)
+    finally:
+        # Worker threads hold their own connection; don't leave it open between jobs.
+        connection.close()
+
+
+_local = threading.local()
+
+
+@contextmanager
+def fanning_out_inline():
+    """Write whole fan-outs on this thread, for callers whose transaction a worker couldn't see."""
+    previous = getattr(_local, 'inline', False)
+    _local.inline = True
+    try:
+        yield
+    finally:
+        _local.inline = previous
+
+
+def start_fan_out(post):
+    max_batches = None if getattr(_local, 'inline', False) else FANOUT_INLINE_BATCHES
+    left_after = fan_out_post(post, max_batches=max_batches)
+    if left_after is not None:
+        get_fanout_executor().submit(finish_fan_out, post, left_after)
+
+
+def schedule_fan_out(post):
+    """Fan the post out once the current transaction commits.
+
+    A rolled back post is never fanned out and the post's own transaction
+    stays short. Only the first ``FANOUT_INLINE_BATCHES`` batches are written
+    on the request thread, so the response for an author with many followers
+    doesn't wait for the whole fan-out; the remaining followers are handed to
+    a background worker.
+    """
+    transaction.on_commit(partial(start_fan_out, post))
+
+
+def backfill_timeline(follower, author):
+    """Copy the author's recent posts into a new follower's timeline."""
+    if is_pull_author(author.id):
+        return
+    recent = Post.objects.filter(user=author).order_by('-created_at', '-id').values_list('id', 'created_at')[:BACKFILL_SIZE]
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner=follower, post_id=post_id, author=author, created_at=created_at) for post_id, created_at in recent],
+        ignore_conflicts=True,
+    )
+
+
+def remove_from_timeline(follower, author):
+    TimelineEntry.objects.filter(owner=follower, author=author).delete()
+
+
+def following_timeline_sources(viewer):
+    """Keyset sources for the viewer's following feed, in (created_at, post id) order."""
+    sources = [(TimelineEntry.objects.filter(owner=viewer), ('-created_at', '-post_id'))]
+    pull_ids = pull_author_ids(viewer)
+    if pull_ids:
+        sources.append((Post.objects.filter(user_id__in=pull_ids), ('-created_at', '-id')))
+    return sources
@@ -1,6 +1,9 @@
 from django.urls import path
+from . import async_views
+from .streams import notification_stream
 from .views import (
     LoginView,
+    TokenLoginView,
     RegisterView,
     PostListCreateView,
     CreatePostView,
@@ -10,22 +13,40 @@ from .views import (
     DeletePostView,
     DeleteCommentView,
     CommentView,
+    PostCommentsView,
     LikeDislikeView,
     NotificationListView,
+    UnreadNotificationCountView,
+    MarkNotificationsReadView,
+    NotificationStreamTicketView,
     UserPostsView,
     FollowStatsView,
+    BulkFollowStatsView,
+    FollowingFeedView,
+    SearchView,
     toggle_follow,
     check_follow_status,
+    check_follow_status_bulk,
     MyPostsView,
     UserSettingView,
+    ViewMetricsView,
+    MoodEntryListCreateView,
+    MoodDistributionView,
+    MoodTrendsView,
+    MoodStreakView,
+    AccountExportView,
+    DeleteAccountView,
  
 )
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
+    path('auth/login/', TokenLoginView.as_view(), name='token_login'),
     path('signup/', RegisterView.as_view(), name='signup'),
 
     path('posts/', PostListCreateView.as_view(), name='posts'),
+    path('feed/following/', FollowingFeedView.as_view(), name='following_feed'),
+    path('search/', SearchView.as_view(), name='search'),
     path('posts/create/', CreatePostView.as_view(), name='create_post'),
     path('posts/user/', UserPostsView.as_view(), name='user_posts'),
     path('posts/<int:post_id>/', PostDetailView.as_view(), name='post_detail'),
@@ -33,15 +54,37 @@ urlpatterns = [
 
     path('posts/<int:post_id>/like/', LikeDislikeView.as_view(), name='like_dislike'),
     path('posts/<int:post_id>/comment/', CommentView.as_view(), name='comment'),
+    path('posts/<int:post_id>/comments/', PostCommentsView.as_view(), name='post_comments'),
     path('comments/<int:comment_id>/delete/', DeleteCommentView.as_view(), name='comment_delete'),
     path('notifications/', NotificationListView.as_view(), name='notifications'),
+    path('notifications/stream/', notification_stream, name='notification_stream'),
+    path('notifications/stream/ticket/', NotificationStreamTicketView.as_view(), name='notification_stream_ticket'),
+    path('notifications/unread-count/', UnreadNotificationCountView.as_view(), name='notification_unread_count'),
+    path('notifications/mark-read/', MarkNotificationsReadView.as_view(), name='notification_mark_read'),
     
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('update-profile/', UpdateProfileView.as_view(), name='update_profile'),
     path('my-posts/', MyPostsView.as_view(), name='my-posts'),
     path('follow-stats/', FollowStatsView.as_view(), name='my_follow_stats'),
+    path('follow-stats/bulk/', BulkFollowStatsView.as_view(), name='bulk_follow_stats'),
     path('follow-stats/<str:username>/', FollowStatsView.as_view(), name='user_follow_stats'),
     path('follow/<str:username>/', toggle_follow, name='toggle_follow'),
+    path('follow-status/bulk/', check_follow_status_bulk, name='check_follow_status_bulk'),
     path('follow-status/<str:username>/', check_follow_status, name='check_follow_status'),
     path('settings/', UserSettingView.as_view(), name='user_settings'),
+    path('export/', AccountExportView.as_view(), name='account_export'),
+    path('account/', DeleteAccountView.as_view(), name='delete_account'),
+    path('moods/', MoodEntryListCreateView.as_view(), name='moods'),
+    path('moods/distribution/', MoodDistributionView.as_view(), name='mood_distribution'),
+    path('moods/trends/', MoodTrendsView.as_view(), name='mood_trends'),
+    path('moods/streak/', MoodStreakView.as_view(), name='mood_streak'),
+    path('metrics/views/', ViewMetricsView.as_view(), name='view_metrics'),
+
+    # Async variants of the read path, for deployments served through bondup_backend.asgi.
+    path('async/posts/', async_views.feed, name='async_posts'),
+    path('async/feed/following/', async_views.following_feed, name='async_following_feed'),
+    path('async/notifications/', async_views.notifications, name='async_notifications'),
+    path('async/profile/', async_views.profile, name='async_profile'),
+    path('async/follow-stats/', async_views.follow_stats, name='async_my_follow_stats'),
+    path('async/follow-stats/<str:username>/', async_views.follow_stats, name='async_user_follow_stats'),
 ]
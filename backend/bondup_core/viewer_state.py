@@ -0,0 +1,51 @@
+from .models import Follow, Like
+
+
+def requested_includes(request):
+    return {name for name in request.query_params.get('include', '').split(',') if name}
+
+
+def embed_my_reaction(viewer, items):
+    reactions = dict(
+        Like.objects.filter(user=viewer, post_id__in=[item['id'] for item in items]).values_list('post_id', 'value')
+    )
+    for item in items:
+        item['my_reaction'] = reactions.get(item['id'])
+
+
+def embed_author_follow_state(viewer, items):
+    author_ids = {item['user'] for item in items}
+    followed = set(
+        Follow.objects.filter(follower=viewer, following_id__in=author_ids).values_list('following_id', flat=True)
+    )
+    for item in items:
+        item['author_followed_by_me'] = item['user'] in followed
+
+
+# Per-viewer fields added to every listing
+VIEWER_FIELDS = {
+    'my_reaction': embed_my_reaction,
+}
+
+# Optional per-viewer fields, opted into with ?include=<name>[,<name>...]
+OPTIONAL_FIELDS = {
+    'author_followed_by_me': embed_author_follow_state,
+}
+
+
+def embed_viewer_state(request, items):
+    """Add the viewer-specific fields to serialized posts, one query per field per page.
+
+    ``items`` usually come from the shared post cache, so they are copied
+    rather than modified in place.
+    """
+    items = [dict(item) for item in items]
+    if not items:
+        return items
+    for embed in VIEWER_FIELDS.values():
+        embed(request.user, items)
+    includes = requested_includes(request)
+    for name, embed in OPTIONAL_FIELDS.items():
+        if name in includes:
+            embed(request.user, items)
+    return items
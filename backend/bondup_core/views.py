@@ -1,17 +1,35 @@
-from datetime import date
-from django.http import JsonResponse
+from datetime import date, timedelta
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
+from django.contrib.auth import authenticate, user_logged_in
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Subquery
+from django.utils import timezone
 
 from rest_framework.parsers import JSONParser
-
-from .models import Post, Like, Comment, Notification, Follow, Profile, UserSetting
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Post, Comment, MoodEntry, Notification, Follow, Profile, UserSetting
+from .conditional import conditional_response, make_etag, post_page_etag
+from .counters import adjust_follow_counters, adjust_post_counters
+from .metrics import serializing, view_stats
+from .notifications import notify, withdraw
+from .pagination import CommentPagination, KeysetPagination, SearchPagination
+from . import exports, moods, search
+from .purges import hide_account, hide_post
+from .reactions import OPPOSITE, react, unreact
+from .routers import ReplicaReadsMixin
+from .post_cache import bump_post_version, serialize_posts, stats as post_cache_stats
+from .viewer_state import embed_viewer_state
+from .timeline import backfill_timeline, following_timeline_sources, remove_from_timeline, schedule_fan_out
+from .streams import TICKET_SECONDS, issue_ticket
 from .serializers import (
     NotificationSerializer,
     UserSerializer,
@@ -21,9 +39,19 @@ from .serializers import (
     CommentSerializer,
     RegisterSerializer,
     UserSettingSerializer,
+    MoodEntrySerializer,
     
 )
 
+def post_page_response(request, paginator, posts):
+    """A page of posts, or 304 when the client already has this exact page."""
+    return conditional_response(
+        request,
+        lambda: paginator.get_paginated_response(embed_viewer_state(request, serialize_posts(posts))),
+        etag=post_page_etag(request, posts, paginator),
+    )
+
+
 class LoginView(APIView):
     def post(self, request):
         username = request.data.get('username')
@@ -36,18 +64,51 @@ class LoginView(APIView):
         return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
 
-class PostListCreateView(APIView):
+class TokenLoginView(APIView):
+    """Log in with a single password check.
+
+    Returns the JWT pair together with the user and their settings, which
+    api/token/ followed by login/ delivered at the cost of hashing the
+    password twice. The user, profile and settings come from one query
+    (see ``ProfileModelBackend``); recording last_login is the only write.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        user = authenticate(request, username=request.data.get('username'), password=request.data.get('password'))
+        if user is None:
+            return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+        # Updates last_login; sent by hand because no session is started.
+        user_logged_in.send(sender=user.__class__, request=request, user=user)
+
+        try:
+            user_settings = user.settings
+        except UserSetting.DoesNotExist:
+            user_settings, _ = UserSetting.objects.get_or_create(user=user)
+        refresh = RefreshToken.for_user(user)
+        return Response({
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+            'user': UserSerializer(user).data,
+            'settings': UserSettingSerializer(user_settings).data,
+        })
+
+
+class PostListCreateView(ReplicaReadsMixin, APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get(self, request):
-        posts = Post.objects.all().order_by('-created_at')
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data)
+        paginator = self.pagination_class()
+        posts = paginator.paginate_queryset(Post.objects.only('id', 'created_at', 'version'), request, view=self)
+        return post_page_response(request, paginator, posts)
 
     def post(self, request):
         serializer = PostCreateSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            post = serializer.save()
+            schedule_fan_out(post)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -58,7 +119,8 @@ class CreatePostView(APIView):
     def post(self, request, format=None):
         serializer = PostCreateSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            post = serializer.save()
+            schedule_fan_out(post)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -78,12 +140,10 @@ class UpdateProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
     def put(self, request):
-        try:
-            profile = Profile.objects.get(user=request.user)
-        except Profile.DoesNotExist:
+        if not Profile.objects.filter(user=request.user).exists():
             return Response({"error": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = UserProfileSerializer(profile, data=request.data, partial=True)  # partial=True allows partial updates
+        serializer = UserProfileSerializer(request.user, data=request.data, partial=True)  # partial=True allows partial updates
         if serializer.is_valid():
             serializer.save()
             return Response({"message": "Profile updated successfully", "profile": serializer.data}, status=status.HTTP_200_OK)
@@ -91,28 +151,43 @@ class UpdateProfileView(APIView):
 
 
 class LikeDislikeView(APIView):
+    """POST ``{"value": "like"|"dislike"}`` to react, DELETE to take the reaction back."""
     permission_classes = [IsAuthenticated]
+    # The author is loaded with the post, for the notification.
+    posts = Post.objects.select_related('user').only('id', 'user__id')
 
     def post(self, request, post_id):
         value = request.data.get("value")
         if value not in ['like', 'dislike']:
             return Response({'detail': 'Invalid value'}, status=status.HTTP_400_BAD_REQUEST)
 
-        post = get_object_or_404(Post, id=post_id)
-
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
-        like.value = value
-        like.save()
-
-        if post.user != request.user:
-            Notification.objects.create(
-                recipient=post.user,
-                actor=request.user,
-                post=post,
-                message=f"{request.user.username} {value}d your post."
-            )
+        post = get_object_or_404(self.posts, id=post_id)
+        # One transaction, so racing taps by the same user leave the
+        # notifications in the order the reactions were written.
+        with transaction.atomic():
+            change = react(request.user, post.id, value)
+            if change and post.user_id != request.user.id:
+                if change == 'flipped':
+                    withdraw(post.user, request.user, post, OPPOSITE[value])
+                notify(post.user, request.user, post, value)
+        return self.reaction_response(post, f'Post {value}d successfully.', value)
 
-        return Response({'detail': f'Post {value}d successfully.'})
+    def delete(self, request, post_id):
+        post = get_object_or_404(self.posts, id=post_id)
+        with transaction.atomic():
+            removed = unreact(request.user, post.id)
+            if removed and post.user_id != request.user.id:
+                withdraw(post.user, request.user, post, removed)
+        return self.reaction_response(post, 'Reaction removed.', None)
+
+    def reaction_response(self, post, detail, my_reaction):
+        counts = Post.objects.filter(pk=post.pk).values('like_count', 'dislike_count').get()
+        return Response({
+            'detail': detail,
+            'likes': counts['like_count'],
+            'dislikes': counts['dislike_count'],
+            'my_reaction': my_reaction,
+        })
 
 
 class CommentView(APIView):
@@ -122,15 +197,12 @@ class CommentView(APIView):
         text = request.data.get('text')
         post = get_object_or_404(Post, id=post_id)
 
-        comment = Comment.objects.create(user=request.user, post=post, text=text)
+        with transaction.atomic():
+            comment = Comment.objects.create(user=request.user, post=post, text=text)
+            adjust_post_counters(post.id, comment_count=1)
         serializer = CommentSerializer(comment)
 
-        Notification.objects.create(
-            recipient=post.user,
-            actor=request.user,
-            post=post,
-            message=f"{request.user.username} commented on your post."
-        )
+        notify(post.user, request.user, post, 'comment')
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -141,10 +213,26 @@ class CommentView(APIView):
         if comment.user != request.user:
             return Response({'error': 'You can only delete your own comment.'}, status=status.HTTP_403_FORBIDDEN)
 
-        comment.delete()
+        with transaction.atomic():
+            comment.delete()
+            adjust_post_counters(post_id, comment_count=-1)
         return Response({'message': 'Comment deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
 
 
+class PostCommentsView(ReplicaReadsMixin, APIView):
+    """The full comment thread of a post, oldest first, one page at a time."""
+    permission_classes = [IsAuthenticated]
+    pagination_class = CommentPagination
+
+    def get(self, request, post_id):
+        post = get_object_or_404(Post.objects.only('id'), id=post_id)
+        paginator = self.pagination_class()
+        comments = paginator.paginate_queryset(Comment.objects.filter(post=post, user__profile__deleted_at__isnull=True).select_related('user'), request, view=self)
+        with serializing():
+            data = CommentSerializer(comments, many=True).data
+        return paginator.get_paginated_response(data)
+
+
 class PostDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -159,7 +247,14 @@ class PostDetailView(APIView):
 
         serializer = PostCreateSerializer(post, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
-            serializer.save(edited=True)
+            # Write only the edited columns: a full save would put back the counters
+            # and deleted_at as they were read, undoing concurrent likes or a delete.
+            fields = [field for field in ('caption', 'image') if field in serializer.validated_data]
+            for field in fields:
+                setattr(post, field, serializer.validated_data[field])
+            post.edited = True
+            post.save(update_fields=[*fields, 'edited'])
+            bump_post_version(post.id)
             return Response(serializer.data)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -170,17 +265,56 @@ class PostDetailView(APIView):
         if post.user != request.user:
             return Response({"error": "You can only delete your own posts."}, status=status.HTTP_403_FORBIDDEN)
 
-        post.delete()
+        hide_post(post)
         return Response({"message": "Post deleted."}, status=status.HTTP_204_NO_CONTENT)
 
 
-class NotificationListView(APIView):
+class NotificationListView(ReplicaReadsMixin, APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get(self, request):
-        notifications = Notification.objects.filter(recipient=request.user).order_by('-created_at')
-        serializer = NotificationSerializer(notifications, many=True, context={'request': request})
-        return Response(serializer.data)
+        paginator = self.pagination_class()
+        notifications = paginator.paginate_queryset(
+            Notification.objects.filter(recipient=request.user).select_related('actor'), request, view=self
+        )
+        with serializing():
+            data = NotificationSerializer(notifications, many=True, context={'request': request}).data
+        return paginator.get_paginated_response(data)
+
+
+class UnreadNotificationCountView(ReplicaReadsMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        unread = Notification.objects.filter(recipient=request.user, is_read=False).count()
+        return Response({'unread': unread})
+
+
+class NotificationStreamTicketView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response({'ticket': issue_ticket(request.user.pk), 'expires_in': TICKET_SECONDS})
+
+
+class MarkNotificationsReadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        notifications = Notification.objects.filter(recipient=request.user, is_read=False)
+        up_to = request.data.get('up_to')
+        if up_to is not None:
+            try:
+                up_to = int(up_to)
+            except (TypeError, ValueError):
+                return Response({'detail': 'up_to must be a notification id.'}, status=status.HTTP_400_BAD_REQUEST)
+            # Coalesced rows move to the top when they change, so "up to" follows
+            # the list order (created_at) rather than raw ids.
+            newest_seen = Notification.objects.filter(id=up_to, recipient=request.user).values('created_at')
+            notifications = notifications.filter(created_at__lte=Subquery(newest_seen))
+        updated = notifications.update(is_read=True)
+        return Response({'updated': updated})
 
 
 class DeletePostView(APIView):
@@ -192,7 +326,7 @@ class DeletePostView(APIView):
         if post.user != request.user:
             return Response({'detail': 'You do not have permission to delete this post.'}, status=status.HTTP_403_FORBIDDEN)
 
-        post.delete()
+        hide_post(post)
         return Response({'detail': 'Post deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -202,65 +336,156 @@ class UserProfileView(APIView):
 
     def get(self, request):
         user = request.user
-        serializer = UserSerializer(user)
-        return Response(serializer.data)
+        # Saving the user also bumps the profile's updated_at, so it covers both.
+        # Accounts from before profiles were created on signup get one here.
+        user.profile, _ = Profile.objects.get_or_create(user=user)
+        updated_at = user.profile.updated_at
+        return conditional_response(
+            request,
+            lambda: Response(UserSerializer(user).data),
+            etag=make_etag(user.id, updated_at),
+            last_modified=updated_at,
+        )
 
     def put(self, request):
-        profile = Profile.objects.get(user=request.user)
-        serializer = UserProfileSerializer(profile, data=request.data, partial=True)
+        serializer = UserProfileSerializer(request.user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
         return Response(serializer.errors, status=400)
 
 
-class FollowStatsView(APIView):
+class FollowStatsView(ReplicaReadsMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, username=None):
-        if username:
-            try:
-                user = User.objects.get(username=username)
-            except User.DoesNotExist:
-                return Response({"error": "User not found"}, status=404)
-        else:
-            user = request.user
+        profiles = Profile.objects.filter(user__username=username, deleted_at__isnull=True) if username else Profile.objects.filter(user=request.user)
+        stats = profiles.values('followers_count', 'following_count').first()
+        if stats is None:
+            return Response({"error": "User not found"}, status=404)
+
+        return conditional_response(
+            request,
+            lambda: Response({
+                "followers": stats['followers_count'],
+                "following": stats['following_count'],
+            }),
+            etag=make_etag(stats['followers_count'], stats['following_count']),
+        )
+
+
+class BulkFollowStatsView(ReplicaReadsMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    max_usernames = 100
 
-        following_count = user.following.count()
-        followers_count = user.followers.count()
+    def get(self, request):
+        usernames = [name for name in request.query_params.get('usernames', '').split(',') if name][:self.max_usernames]
+        rows = Profile.objects.filter(user__username__in=usernames, deleted_at__isnull=True).values_list(
+            'user__username', 'followers_count', 'following_count'
+        )
         return Response({
-            "followers": followers_count,
-            "following": following_count,
+            username: {"followers": followers, "following": following}
+            for username, followers, following in rows
         })
 
 
-class UserPostsView(APIView):
+class UserPostsView(ReplicaReadsMixin, APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get(self, request):
         user = request.user
-        posts = Post.objects.filter(user=user).order_by("-created_at")
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data)
+        paginator = self.pagination_class()
+        posts = paginator.paginate_queryset(Post.objects.filter(user=user).only('id', 'created_at', 'version'), request, view=self)
+        return post_page_response(request, paginator, posts)
+
+
+class FollowingFeedView(ReplicaReadsMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get(self, request):
+        paginator = self.pagination_class()
+        keys = paginator.paginate_sources(following_timeline_sources(request.user), request, Post)
+        posts = Post.objects.only('id', 'version').in_bulk([post_id for _, post_id in keys])
+        posts = [posts[post_id] for _, post_id in keys if post_id in posts]
+        return post_page_response(request, paginator, posts)
+
+
+class SearchView(ReplicaReadsMixin, APIView):
+    """Ranked full-text search: ``?q=...&type=posts`` (default) or ``type=people``.
+
+    Only the newest ``SEARCH_RANK_WINDOW`` matches are ranked and paged;
+    ``truncated`` is true when older matches were left out.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = SearchPagination
+
+    def get(self, request):
+        if not search.search_available():
+            return Response({'error': 'Search is not available on this database.'}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+        kind = request.query_params.get('type', 'posts')
+        if kind not in ('posts', 'people'):
+            return Response({'error': "type must be 'posts' or 'people'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        expression = search.match_expression(request.query_params.get('q', ''))
+        if expression is None:
+            return Response({'next': None, 'results': [], 'truncated': False})
+
+        paginator = self.pagination_class()
+        index = search.POST_INDEX if kind == 'posts' else search.PROFILE_INDEX
+        ids = paginator.paginate_matches(lambda position, limit: search.search(index, expression, position, limit), request)
+
+        if kind == 'posts':
+            posts = Post.objects.only('id', 'version').in_bulk(ids)
+            results = embed_viewer_state(request, serialize_posts([posts[pk] for pk in ids if pk in posts]))
+        else:
+            profiles = {
+                row['user_id']: row
+                for row in Profile.objects.filter(user_id__in=ids).values(
+                    'user_id', 'user__username', 'name', 'bio', 'followers_count'
+                )
+            }
+            results = [
+                {
+                    'username': row['user__username'],
+                    'name': row['name'],
+                    'bio': row['bio'],
+                    'followers': row['followers_count'],
+                }
+                for row in (profiles.get(pk) for pk in ids) if row
+            ]
+        response = paginator.get_paginated_response(results)
+        response.data['truncated'] = search.truncated(index, expression)
+        return response
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def toggle_follow(request, username):
     try:
-        target_user = User.objects.get(username=username)
+        target_user = User.objects.get(username=username, is_active=True)
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=404)
 
     if target_user == request.user:
         return Response({"error": "You cannot follow yourself."}, status=400)
 
-    follow = Follow.objects.filter(follower=request.user, following=target_user).first()
+    with transaction.atomic():
+        follow = Follow.objects.filter(follower=request.user, following=target_user).first()
+        if follow:
+            follow.delete()
+            adjust_follow_counters(request.user.id, target_user.id, -1)
+        else:
+            Follow.objects.create(follower=request.user, following=target_user)
+            adjust_follow_counters(request.user.id, target_user.id, 1)
+
     if follow:
-        follow.delete()
+        remove_from_timeline(request.user, target_user)
         return Response({"status": "unfollowed"}, status=200)
     else:
-        Follow.objects.create(follower=request.user, following=target_user)
+        backfill_timeline(request.user, target_user)
         return Response({"status": "followed"}, status=201)
 
 
@@ -268,31 +493,47 @@ def toggle_follow(request, username):
 @permission_classes([IsAuthenticated])
 def check_follow_status(request, username):
     try:
-        target_user = User.objects.get(username=username)
+        target_user = User.objects.get(username=username, is_active=True)
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=404)
 
     is_following = Follow.objects.filter(follower=request.user, following=target_user).exists()
     return Response({"is_following": is_following})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def check_follow_status_bulk(request):
+    usernames = [name for name in request.query_params.get('usernames', '').split(',') if name][:100]
+    followed = set(
+        Follow.objects.filter(follower=request.user, following__username__in=usernames, following__is_active=True)
+        .values_list('following__username', flat=True)
+    )
+    return Response({username: username in followed for username in usernames})
   
-class MyPostsView(APIView):
+class MyPostsView(ReplicaReadsMixin, APIView):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get(self, request):
         user = request.user
-        posts = Post.objects.filter(user=user).order_by('-created_at')
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data)
+        paginator = self.pagination_class()
+        posts = paginator.paginate_queryset(Post.objects.filter(user=user).only('id', 'created_at', 'version'), request, view=self)
+        return post_page_response(request, paginator, posts)
     
 class UserSettingView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         user_settings, _ = UserSetting.objects.get_or_create(user=request.user)
-        serializer = UserSettingSerializer(user_settings)
-        return Response(serializer.data)
+        return conditional_response(
+            request,
+            lambda: Response(UserSettingSerializer(user_settings).data),
+            etag=make_etag(request.user.id, user_settings.updated_at),
+            last_modified=user_settings.updated_at,
+        )
 
     def put(self, request):
         user_settings, _ = UserSetting.objects.get_or_create(user=request.user)
@@ -306,13 +547,128 @@ class DeleteCommentView(APIView):
 
     def delete(self, request, comment_id):
         try:
-            comment = Comment.objects.get(id=comment_id)
+            comment = Comment.objects.get(id=comment_id, user__profile__deleted_at__isnull=True)
             # Allow deletion only if the current user is the comment owner or post owner
             if comment.user == request.user or comment.post.user == request.user:
-                comment.delete()
+                with transaction.atomic():
+                    comment.delete()
+                    adjust_post_counters(comment.post_id, comment_count=-1)
                 return Response({'message': 'Comment deleted'}, status=204)
             else:
                 return Response({'error': 'Unauthorized'}, status=403)
         except Comment.DoesNotExist:
-            return Response({'error': 'Comment not found'}, status=404)   
-        
+            return Response({'error': 'Comment not found'}, status=404)
+
+
+class ViewMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'views': view_stats.snapshot(),
+            'post_cache': post_cache_stats.snapshot(),
+        })
+
+
+class MoodEntryListCreateView(ReplicaReadsMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get(self, request):
+        paginator = self.pagination_class()
+        entries = paginator.paginate_queryset(MoodEntry.objects.filter(user=request.user), request, view=self)
+        with serializing():
+            data = MoodEntrySerializer(entries, many=True).data
+        return paginator.get_paginated_response(data)
+
+    def post(self, request):
+        serializer = MoodEntrySerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        entry = moods.record_mood(request.user, **serializer.validated_data)
+        return Response(MoodEntrySerializer(entry).data, status=status.HTTP_201_CREATED)
+
+
+class MoodRangeView(ReplicaReadsMixin, APIView):
+    """Base for analytics over ``?start=&end=`` (ISO dates, inclusive; the last 30 days by default)."""
+    permission_classes = [IsAuthenticated]
+    default_days = 30
+    max_days = 366
+
+    def get(self, request):
+        try:
+            end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else timezone.localdate()
+            start = (
+                date.fromisoformat(request.query_params['start']) if 'start' in request.query_params
+                else end - timedelta(days=self.default_days - 1)
+            )
+        except ValueError:
+            return Response({'error': 'start and end must be dates (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+        if not timedelta(0) <= end - start < timedelta(days=self.max_days):
+            return Response(
+                {'error': f'start must be on or before end, at most {self.max_days} days apart.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return self.get_range(request, start, end)
+
+
+class MoodDistributionView(MoodRangeView):
+    def get_range(self, request, start, end):
+        counts = moods.distribution(request.user, start, end)
+        return Response({'start': start, 'end': end, 'total': sum(counts.values()), 'moods': counts})
+
+
+class MoodTrendsView(MoodRangeView):
+    """Mood counts per ``?period=day`` (default) or ``week``."""
+
+    def get_range(self, request, start, end):
+        period = request.query_params.get('period', 'day')
+        if period not in moods.PERIODS:
+            return Response({'error': "period must be 'day' or 'week'."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'start': start,
+            'end': end,
+            'period': period,
+            'results': moods.trends(request.user, start, end, period),
+        })
+
+
+class MoodStreakView(ReplicaReadsMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        streak, last_day = moods.current_streak(request.user)
+        return Response({'current_streak': streak, 'last_logged': last_day})
+
+
+class AccountExportView(APIView):
+    """Everything stored about the user as NDJSON; ``?gzip=1`` compresses it on the fly."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        chunks = exports.ndjson_chunks(exports.account_records(request.user), compress)
+        if isinstance(request._request, ASGIRequest):
+            chunks = exports.aiterate(chunks)
+
+        filename = f'bondup-{request.user.username}.ndjson' + ('.gz' if compress else '')
+        response = StreamingHttpResponse(chunks, content_type='application/gzip' if compress else 'application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'no-store'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class DeleteAccountView(APIView):
+    """Delete the account after confirming the password.
+
+    The account is deactivated and hidden at once; its data is removed
+    later by purge_deleted.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def delete(self, request):
+        if not request.user.check_password(request.data.get('password')):
+            return Response({'error': 'Password is incorrect.'}, status=status.HTTP_403_FORBIDDEN)
+        hide_account(request.user)
+        return Response({'message': 'Account deleted.'}, status=status.HTTP_204_NO_CONTENT)
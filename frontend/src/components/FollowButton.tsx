@@ -1,45 +1,109 @@
 import React, { useEffect, useState } from 'react';
 import '../styles/App.css';
 
+const API = 'http://127.0.0.1:8000/api';
+// Matches the server's cap on usernames per bulk lookup.
+const BULK_LIMIT = 100;
+const FOLLOW_CHANGED_EVENT = 'follow:changed';
+
 interface FollowButtonProps {
   targetUsername: string;
+  // Already known from the listing (e.g. ?include=author_followed_by_me); skips the lookup.
+  initialFollowing?: boolean;
 }
 
-const FollowButton: React.FC<FollowButtonProps> = ({ targetUsername }) => {
-  const [isFollowing, setIsFollowing] = useState<boolean | null>(null);
-  const [loading, setLoading] = useState(true);
+const known = new Map<string, boolean>();
+let pending = new Map<string, ((following: boolean) => void)[]>();
+let flushScheduled = false;
 
-  useEffect(() => {
-    const token = localStorage.getItem('token');
+// Buttons rendered in the same pass (a page of posts, a follower list) share
+// one follow-status/bulk/ request instead of one request per button.
+const flush = async () => {
+  const batch = pending;
+  pending = new Map();
+  flushScheduled = false;
 
-    fetch(`/api/follow-status/${targetUsername}/`, {
-      headers: {
-        'Content-Type': 'application/json',
-        Authorization: `Token ${token}`,
-      },
-    })
-      .then(res => res.json())
-      .then(data => {
-        setIsFollowing(data.is_following);
-        setLoading(false);
+  const token = localStorage.getItem('accessToken');
+  const usernames = [...batch.keys()];
+  for (let start = 0; start < usernames.length; start += BULK_LIMIT) {
+    const chunk = usernames.slice(start, start + BULK_LIMIT);
+    let statuses: Record<string, boolean> = {};
+    try {
+      const res = await fetch(`${API}/follow-status/bulk/?usernames=${chunk.map(encodeURIComponent).join(',')}`, {
+        headers: { Authorization: `Bearer ${token}` },
       });
+      if (res.ok) statuses = await res.json();
+    } catch (err) {
+      console.error('Failed to fetch follow status:', err);
+    }
+    for (const username of chunk) {
+      const following = Boolean(statuses[username]);
+      known.set(username, following);
+      batch.get(username)?.forEach((resolve) => resolve(following));
+    }
+  }
+};
+
+const followStatus = (username: string) =>
+  new Promise<boolean>((resolve) => {
+    const cached = known.get(username);
+    if (cached !== undefined) {
+      resolve(cached);
+      return;
+    }
+    pending.set(username, [...(pending.get(username) ?? []), resolve]);
+    if (!flushScheduled) {
+      flushScheduled = true;
+      setTimeout(flush, 0);
+    }
+  });
+
+const FollowButton: React.FC<FollowButtonProps> = ({ targetUsername, initialFollowing }) => {
+  const [isFollowing, setIsFollowing] = useState<boolean | null>(initialFollowing ?? null);
+
+  useEffect(() => {
+    if (initialFollowing !== undefined) {
+      known.set(targetUsername, initialFollowing);
+      setIsFollowing(initialFollowing);
+      return;
+    }
+    let active = true;
+    followStatus(targetUsername).then((following) => {
+      if (active) setIsFollowing(following);
+    });
+    return () => {
+      active = false;
+    };
+  }, [targetUsername, initialFollowing]);
+
+  // Keep every button for the same account in step after a toggle.
+  useEffect(() => {
+    const onChange = (event: Event) => {
+      const { username, following } = (event as CustomEvent).detail;
+      if (username === targetUsername) setIsFollowing(following);
+    };
+    window.addEventListener(FOLLOW_CHANGED_EVENT, onChange);
+    return () => window.removeEventListener(FOLLOW_CHANGED_EVENT, onChange);
   }, [targetUsername]);
 
   const toggleFollow = async () => {
-    const token = localStorage.getItem('token');
+    const token = localStorage.getItem('accessToken');
 
-    const res = await fetch(`/api/toggle-follow/${targetUsername}/`, {
+    const res = await fetch(`${API}/follow/${targetUsername}/`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
-        Authorization: `Token ${token}`,
+        Authorization: `Bearer ${token}`,
       },
     });
+    if (!res.ok) return;
     const data = await res.json();
-    setIsFollowing(data.is_following);
+    const following = data.status === 'followed';
+    known.set(targetUsername, following);
+    window.dispatchEvent(new CustomEvent(FOLLOW_CHANGED_EVENT, { detail: { username: targetUsername, following } }));
   };
 
-  if (loading) return null;
+  if (isFollowing === null) return null;
 
   return (
     <button
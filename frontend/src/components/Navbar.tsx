@@ -1,3 +1,5 @@
+import { Link } from "react-router-dom";
+import useUnreadCount from "../hooks/useUnreadCount";
 import type { User } from "../types/types";
 
 interface NavbarProps {
@@ -6,10 +8,16 @@ interface NavbarProps {
 }
 
 const Navbar = ({ user, onLogout }: NavbarProps) => {
+  const unread = useUnreadCount();
+
   return (
     <nav className="navbar">
       <h1>BondUp</h1>
       <span>Welcome, {user.username}</span>
+      <Link to="/notifications" className="notification-badge-link">
+        🔔
+        {unread > 0 && <span className="notification-badge">{unread > 99 ? "99+" : unread}</span>}
+      </Link>
       <button onClick={onLogout}>Logout</button>
     </nav>
   );
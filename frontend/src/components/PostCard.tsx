@@ -1,5 +1,5 @@
 import { useEffect, useRef, useState } from "react";
-import type { Post } from "../types/types";
+import type { Comment, Post } from "../types/types";
 import { MoreHorizontal } from "lucide-react";
 import {YOUTUBE_API_KEY} from "../config";
 
@@ -40,6 +40,10 @@ export default function PostCard({
   const [editImage, setEditImage] = useState<File | null>(null);
   const menuRef = useRef<HTMLDivElement>(null);
 
+  // Feed posts only carry the latest few comments; the full thread is paged in on demand.
+  const [thread, setThread] = useState<Comment[] | null>(null);
+  const [threadNext, setThreadNext] = useState<string | null>(null);
+
   const [videos, setVideos] = useState<Video[]>([]);
   const [loadingVideos, setLoadingVideos] = useState(false);
 
@@ -77,6 +81,28 @@ export default function PostCard({
     }
   };
 
+  const loadComments = async (url: string) => {
+    const accessToken = localStorage.getItem("accessToken");
+    try {
+      const res = await fetch(url, {
+        headers: { Authorization: `Bearer ${accessToken}` },
+      });
+      if (!res.ok) return;
+      const data = await res.json();
+      setThread((prev) => [...(prev ?? []), ...data.results]);
+      setThreadNext(data.next);
+    } catch (error) {
+      console.error("Error loading comments:", error);
+    }
+  };
+
+  useEffect(() => {
+    setThread(null);
+    setThreadNext(null);
+  }, [post.comments]);
+
+  const comments = thread ?? post.comments;
+
   const handleEditSubmit = async () => {
     if (onEdit) {
       await onEdit(post.id, { caption: editCaption, image: editImage });
@@ -211,7 +237,15 @@ export default function PostCard({
         </form>
 
         <div className="comments">
-          {post.comments?.map((comment) => (
+          {thread === null && post.comment_count > (post.comments?.length ?? 0) && (
+            <button
+              className="view-comments-btn"
+              onClick={() => loadComments(`http://127.0.0.1:8000/api/posts/${post.id}/comments/`)}
+            >
+              View all {post.comment_count} comments
+            </button>
+          )}
+          {comments?.map((comment) => (
             <div key={comment.id} className="comment">
               <strong>{comment.user}</strong>: {comment.text}
               {(comment.user === currentUsername || post.user_username === currentUsername) && (
@@ -225,6 +259,11 @@ export default function PostCard({
               )}
             </div>
           ))}
+          {threadNext && (
+            <button className="view-comments-btn" onClick={() => loadComments(threadNext)}>
+              Load more comments
+            </button>
+          )}
         </div>
       </div>
     </div>
@@ -0,0 +1,40 @@
+import { useEffect, useState } from "react";
+
+const POLL_INTERVAL_MS = 30000;
+
+// Fired by the notifications page after it marks notifications read.
+export const NOTIFICATIONS_READ_EVENT = "notifications:read";
+
+const useUnreadCount = () => {
+  const [unread, setUnread] = useState(0);
+
+  useEffect(() => {
+    const token = localStorage.getItem("accessToken");
+    if (!token) return;
+
+    const refresh = async () => {
+      try {
+        const res = await fetch("http://127.0.0.1:8000/api/notifications/unread-count/", {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        if (!res.ok) return;
+        const data = await res.json();
+        setUnread(data.unread);
+      } catch (err) {
+        console.error("Failed to fetch unread count:", err);
+      }
+    };
+
+    refresh();
+    const timer = window.setInterval(refresh, POLL_INTERVAL_MS);
+    window.addEventListener(NOTIFICATIONS_READ_EVENT, refresh);
+    return () => {
+      window.clearInterval(timer);
+      window.removeEventListener(NOTIFICATIONS_READ_EVENT, refresh);
+    };
+  }, []);
+
+  return unread;
+};
+
+export default useUnreadCount;
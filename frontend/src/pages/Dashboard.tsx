@@ -4,14 +4,18 @@ import type { Post } from "../types/types";
 import "../styles/App.css";
 import PostCard from "../components/PostCard";
 
+const FEED_URL = "http://127.0.0.1:8000/api/posts/";
+
 const Dashboard = () => {
   const [posts, setPosts] = useState<Post[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
 
-  const fetchPosts = async () => {
+  // The feed is cursor-paginated: the first page replaces the list, `next` pages extend it.
+  const fetchPosts = async (url: string = FEED_URL) => {
     const accessToken = localStorage.getItem("accessToken");
 
     try {
-      const response = await fetch("http://127.0.0.1:8000/api/posts/", {
+      const response = await fetch(url, {
         headers: {
           Authorization: `Bearer ${accessToken}`,
         },
@@ -19,7 +23,8 @@ const Dashboard = () => {
 
       if (response.ok) {
         const data = await response.json();
-        setPosts(data);
+        setPosts((current) => (url === FEED_URL ? data.results : [...current, ...data.results]));
+        setNextPage(data.next);
       } else {
         console.error("Failed to fetch posts");
       }
@@ -32,44 +37,38 @@ const Dashboard = () => {
     fetchPosts();
   }, []);
 
-  const handleLike = async (postId: number) => {
-    const accessToken = localStorage.getItem("accessToken");
-
-    try {
-      const res = await fetch(`http://127.0.0.1:8000/api/posts/${postId}/like/`, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-          Authorization: `Bearer ${accessToken}`,
-        },
-        body: JSON.stringify({ value: "like" }),
-      });
-
-      if (res.ok) fetchPosts();
-    } catch (error) {
-      console.error("Error liking post:", error);
-    }
+  const applyReaction = async (postId: number, res: Response) => {
+    const { likes, dislikes, my_reaction } = await res.json();
+    setPosts((current) =>
+      current.map((post) => (post.id === postId ? { ...post, likes, dislikes, my_reaction } : post))
+    );
   };
 
-  const handleDislike = async (postId: number) => {
+  // Tapping the reaction you already gave takes it back.
+  const sendReaction = async (postId: number, value: "like" | "dislike") => {
     const accessToken = localStorage.getItem("accessToken");
+    const undo = posts.find((post) => post.id === postId)?.my_reaction === value;
 
     try {
       const res = await fetch(`http://127.0.0.1:8000/api/posts/${postId}/like/`, {
-        method: "POST",
+        method: undo ? "DELETE" : "POST",
         headers: {
           "Content-Type": "application/json",
           Authorization: `Bearer ${accessToken}`,
         },
-        body: JSON.stringify({ value: "dislike" }),
+        body: undo ? undefined : JSON.stringify({ value }),
       });
 
-      if (res.ok) fetchPosts();
+      if (res.ok) await applyReaction(postId, res);
     } catch (error) {
-      console.error("Error disliking post:", error);
+      console.error(`Error sending ${value}:`, error);
     }
   };
 
+  const handleLike = (postId: number) => sendReaction(postId, "like");
+
+  const handleDislike = (postId: number) => sendReaction(postId, "dislike");
+
   const handleComment = async (postId: number, text: string) => {
     const accessToken = localStorage.getItem("accessToken");
 
@@ -155,6 +154,11 @@ const Dashboard = () => {
             />
           ))}
         </div>
+        {nextPage && (
+          <button className="load-more-btn" onClick={() => fetchPosts(nextPage)}>
+            Load more
+          </button>
+        )}
       </div>
     </div>
   );
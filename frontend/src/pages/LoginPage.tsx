@@ -16,8 +16,8 @@ function LoginPage({ setUser }: Props) {
     e.preventDefault();
 
     try {
-      // Step 1: Get tokens
-      const tokenResponse = await fetch(`${backend_api}token/`, {
+      // One request checks the password once and returns tokens and user together
+      const response = await fetch(`${backend_api}auth/login/`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -25,28 +25,12 @@ function LoginPage({ setUser }: Props) {
         body: JSON.stringify({ username, password }),
       });
 
-      if (!tokenResponse.ok) {
-        throw new Error("Token fetch failed");
+      if (!response.ok) {
+        throw new Error("Login failed");
       }
-      const tokenData = await tokenResponse.json();
-      const { access, refresh } = tokenData;
 
-      // Step 2: Use access token to get user data
-      const userResponse = await fetch(`${backend_api}login/`, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-          Authorization: `Bearer ${access}`,
-        },
-        body: JSON.stringify({ username, password }),
-      });
-
-      if (!userResponse.ok) {
-        throw new Error("User fetch failed");
-      }
-
-      const userData = await userResponse.json();
-      const user: User = userData.user;
+      const { access, refresh, user }: { access: string; refresh: string; user: User } =
+        await response.json();
 
       // Save tokens and user to localStorage
       localStorage.setItem("accessToken", access);
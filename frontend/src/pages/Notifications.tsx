@@ -1,6 +1,7 @@
 import Navbar from "../components/Navbar";
 import Sidebar from "../components/Sidebar";
 import { useEffect, useState } from "react";
+import { NOTIFICATIONS_READ_EVENT } from "../hooks/useUnreadCount";
 import type { User } from "../types/types";
 
 type Props = {
@@ -8,6 +9,11 @@ type Props = {
   onLogout: () => void;
 };
 
+// Used when the stream is unavailable (the API is not served over ASGI).
+const POLL_INTERVAL_MS = 30000;
+// Pause before reopening a stream that dropped, as EventSource's own retry would.
+const RECONNECT_DELAY_MS = 3000;
+
 type Notification = {
   id: number;
   actor____username?: string;
@@ -19,9 +25,27 @@ type Notification = {
 export default function Notifications({ user, onLogout }: Props) {
   const [notifications, setNotifications] = useState<Notification[]>([]);
   const [error, setError] = useState<string | null>(null);
+  const [nextPage, setNextPage] = useState<string | null>(null);
 
- useEffect(() => {
-  const fetchNotifications = async () => {
+  // Only up to the newest notification shown, so anything arriving meanwhile stays unread.
+  const markRead = async (upTo: number, token: string) => {
+    try {
+      await fetch("http://127.0.0.1:8000/api/notifications/mark-read/", {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          Authorization: `Bearer ${token}`,
+        },
+        body: JSON.stringify({ up_to: upTo }),
+      });
+      window.dispatchEvent(new Event(NOTIFICATIONS_READ_EVENT));
+    } catch (err) {
+      console.error("Failed to mark notifications read:", err);
+    }
+  };
+
+  // Newest first; `next` URLs continue the list further back.
+  const fetchNotifications = async (url?: string) => {
     const token = localStorage.getItem("accessToken");
 
     if (!token) {
@@ -30,7 +54,7 @@ export default function Notifications({ user, onLogout }: Props) {
     }
 
     try {
-      const res = await fetch("http://127.0.0.1:8000/api/notifications/", {
+      const res = await fetch(url ?? "http://127.0.0.1:8000/api/notifications/", {
         method: "GET",
         headers: {
           "Content-Type": "application/json",
@@ -48,15 +72,99 @@ export default function Notifications({ user, onLogout }: Props) {
       }
 
       const data = await res.json();
-      setNotifications(data);
+      setNotifications((current) => (url ? [...current, ...data.results] : data.results));
+      setNextPage(data.next);
+      if (!url && data.results.length > 0) markRead(data.results[0].id, token);
     } catch (err) {
       console.error("Failed to fetch notifications:", err);
       setError("Could not load notifications.");
     }
   };
 
-  fetchNotifications();
-}, []);
+  useEffect(() => {
+    fetchNotifications();
+  }, []);
+
+  useEffect(() => {
+    const token = localStorage.getItem("accessToken");
+    if (!token) return;
+
+    let pollTimer: number | undefined;
+    let lastUnread: number | null = null;
+
+    const poll = async () => {
+      try {
+        const res = await fetch("http://127.0.0.1:8000/api/notifications/unread-count/", {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        if (!res.ok) return;
+        const { unread } = await res.json();
+        if (lastUnread !== null && unread !== lastUnread) fetchNotifications();
+        lastUnread = unread;
+      } catch (err) {
+        console.error("Failed to poll notifications:", err);
+      }
+    };
+
+    const startPolling = () => {
+      if (pollTimer !== undefined) return;
+      poll();
+      pollTimer = window.setInterval(poll, POLL_INTERVAL_MS);
+    };
+
+    // EventSource cannot send headers, and a bearer token in the URL would end
+    // up in access logs, so each connection uses a short-lived single-use ticket.
+    let source: EventSource | undefined;
+    let closed = false;
+
+    const connect = async () => {
+      let ticket: string;
+      try {
+        const res = await fetch("http://127.0.0.1:8000/api/notifications/stream/ticket/", {
+          method: "POST",
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        if (!res.ok) throw new Error(`ticket request failed with ${res.status}`);
+        ({ ticket } = await res.json());
+      } catch (err) {
+        console.error("Failed to open the notification stream:", err);
+        startPolling();
+        return;
+      }
+      if (closed) return;
+
+      const current = new EventSource(
+        `http://127.0.0.1:8000/api/notifications/stream/?ticket=${encodeURIComponent(ticket)}`
+      );
+      source = current;
+      let opened = false;
+      current.onopen = () => {
+        opened = true;
+      };
+      // Coalesced notifications arrive again with the same id, so replace in place.
+      current.addEventListener("notification", (event) => {
+        const incoming: Notification = JSON.parse((event as MessageEvent).data);
+        setNotifications((list) => [incoming, ...list.filter((n) => n.id !== incoming.id)]);
+      });
+      // EventSource's own retry reuses the spent ticket, so take over: a
+      // stream that was open reconnects with a new ticket, and one the server
+      // refused outright (e.g. 501 under WSGI) falls back to polling.
+      current.onerror = () => {
+        current.close();
+        if (closed) return;
+        if (opened) window.setTimeout(connect, RECONNECT_DELAY_MS);
+        else startPolling();
+      };
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      source?.close();
+      window.clearInterval(pollTimer);
+    };
+  }, []);
 
 
   return (
@@ -80,6 +188,11 @@ export default function Notifications({ user, onLogout }: Props) {
             ))}
           </ul>
         )}
+        {nextPage && (
+          <button className="load-more-btn" onClick={() => fetchNotifications(nextPage)}>
+            Load more
+          </button>
+        )}
       </div>
     </div>
   );
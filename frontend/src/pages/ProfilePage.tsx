@@ -30,6 +30,7 @@ const ProfilePage = ({ handleLogout }: { handleLogout: () => void }) => {
   });
 
   const [posts, setPosts] = useState<Post[]>([]);
+  const [nextPostsPage, setNextPostsPage] = useState<string | null>(null);
   const [followers, setFollowers] = useState(0);
   const [following, setFollowing] = useState(0);
   const navigate = useNavigate();
@@ -62,14 +63,16 @@ const ProfilePage = ({ handleLogout }: { handleLogout: () => void }) => {
     }
   }, [accessToken]);
 
-  const fetchUserPosts = useCallback(async () => {
+  // Without a cursor URL this reloads the first page; `next` URLs append to the list.
+  const fetchUserPosts = useCallback(async (url?: string) => {
     try {
-      const res = await fetch(`${backend_api}my-posts/`, {
+      const res = await fetch(url ?? `${backend_api}my-posts/`, {
         method: "GET",
         headers: { Authorization: `Bearer ${accessToken}` },
       });
       const data = await res.json();
-      setPosts(data);
+      setPosts((current) => (url ? [...current, ...data.results] : data.results));
+      setNextPostsPage(data.next);
     } catch (error) {
       console.error("Failed to fetch posts", error);
     }
@@ -348,6 +351,11 @@ const ProfilePage = ({ handleLogout }: { handleLogout: () => void }) => {
             />
           ))}
         </div>
+        {nextPostsPage && (
+          <button className="load-more-btn" onClick={() => fetchUserPosts(nextPostsPage)}>
+            Load more
+          </button>
+        )}
       </div>
     </div>
   );
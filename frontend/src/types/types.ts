@@ -23,7 +23,9 @@ export type Post = {
   dislikes: number;
   user_liked: boolean;
   user_disliked: boolean;
+  my_reaction: "like" | "dislike" | null;
   comments: Comment[];
+  comment_count: number;
   is_deleted: boolean;
   edited: boolean;
   user_username: string;                   